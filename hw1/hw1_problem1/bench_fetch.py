@@ -0,0 +1,257 @@
+import sys
+import os
+import json
+import time
+import tempfile
+import threading
+import resource
+import subprocess
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import fetch_and_process
+
+"""
+Local benchmark for fetch_and_process.py
+Starts a stub HTTP server with injected latency and times runs at several concurrency levels
+"""
+
+LATENCY_S = 0.2
+NUM_URLS = 40
+BODY = b"<html><body>" + b"hello world " * 50 + b"</body></html>"
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        if self.path.startswith("/big/"):
+            self.send_big(int(self.path.split("/")[2]))
+            return
+        if self.path.startswith("/fast/"):
+            self.send_body(BODY)
+            return
+        if self.path.startswith("/cached/"):
+            self.send_cached()
+            return
+        if self.path.startswith("/redirect/"):
+            self.send_response(302)
+            self.send_header("Location", "/cached/" + self.path.split("/")[2])
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        time.sleep(LATENCY_S)
+        if self.path.startswith("/status/404"):
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_body(BODY)
+
+    def send_body(self, body):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_cached(self):
+        # validated resource: a matching If-None-Match gets an empty 304
+        time.sleep(LATENCY_S)
+        etag = '"v1-%s"' % self.path.split("/")[2]
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        body = BODY * 20
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", "Sat, 13 Sep 2025 02:15:27 GMT")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_big(self, mb):
+        # text body of `mb` MiB written in chunks; words straddle the chunk edges
+        chunk = (b"lorem ipsum dolor " * 4000)[:1024 * 1024]
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("Content-Length", str(len(chunk) * mb))
+        self.end_headers()
+        for _ in range(mb):
+            self.wfile.write(chunk)
+
+    def log_message(self, fmt, *args):
+        pass
+
+
+def start_stub():
+    # stub server on a free local port, served from a daemon thread
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def run(urls_path, out_dir, extra_args):
+    start = time.time()
+    fetch_and_process.main([urls_path, out_dir] + extra_args)
+    return time.time() - start
+
+
+def peak_rss_mb(urls_path, out_dir, extra_args):
+    # runs the fetcher in a child process and returns its peak RSS in MiB
+    before = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    subprocess.run([sys.executable, "fetch_and_process.py", urls_path, out_dir] + extra_args, check=True,
+                   cwd=os.path.dirname(os.path.abspath(__file__)))
+    after = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    # ru_maxrss for children is a high-water mark, so only growth is visible
+    return max(before, after) / 1024
+
+
+def bench_memory(port, tmp):
+    print("peak RSS with --stream (high-water mark across runs, should stay flat)")
+    for mb in [8, 64, 256]:
+        urls_path = os.path.join(tmp, f"big_{mb}.txt")
+        with open(urls_path, "w") as f:
+            f.write(f"http://127.0.0.1:{port}/big/{mb}\n")
+        out_dir = os.path.join(tmp, f"big_{mb}")
+        rss = peak_rss_mb(urls_path, out_dir, ["--stream"])
+        with open(os.path.join(out_dir, "responses.jsonl")) as f:
+            entry = json.loads(f.readline())
+        assert entry["word_count"] == entry["content_length"] // 6, entry
+        print(f"  body={mb:>4} MiB  peak rss={rss:6.1f} MiB")
+
+    for count in [1000, 20000]:
+        urls_path = os.path.join(tmp, f"many_{count}.txt")
+        with open(urls_path, "w") as f:
+            for i in range(count):
+                f.write(f"http://127.0.0.1:{port}/fast/{i}\n")
+        out_dir = os.path.join(tmp, f"many_{count}")
+        rss = peak_rss_mb(urls_path, out_dir, ["--stream", "--concurrency", "8"])
+        print(f"  urls={count:>6}    peak rss={rss:6.1f} MiB")
+
+
+def bench_cache(port, tmp):
+    print("repeated run with --cache-dir")
+    urls_path = os.path.join(tmp, "cached.txt")
+    with open(urls_path, "w") as f:
+        for i in range(20):
+            f.write(f"http://127.0.0.1:{port}/cached/{i}\n")
+    cache_dir = os.path.join(tmp, "cache")
+
+    runs = []
+    for label in ["cold", "warm"]:
+        out_dir = os.path.join(tmp, f"cache_{label}")
+        elapsed = run(urls_path, out_dir, ["--concurrency", "4", "--cache-dir", cache_dir])
+        with open(os.path.join(out_dir, "summary.json")) as f:
+            summary = json.load(f)
+        with open(os.path.join(out_dir, "responses.json")) as f:
+            runs.append([(r["status_code"], r["content_length"], r["word_count"]) for r in json.load(f)])
+        cache = summary["http_cache"]
+        print(f"  {label}  {elapsed:5.2f}s  hits={cache['hits']} misses={cache['misses']}"
+              f" bytes_saved={cache['bytes_saved']} downloaded={summary['total_bytes_downloaded']}"
+              f" from_cache={summary['total_bytes_from_cache']}")
+    # a 304 served from cache must look the same as the original 200
+    assert runs[0] == runs[1]
+
+    # a tiny bound forces LRU eviction
+    out_dir = os.path.join(tmp, "cache_small")
+    run(urls_path, out_dir, ["--cache-dir", os.path.join(tmp, "cache_small_dir"), "--cache-max-mb", "0.05"])
+    with open(os.path.join(out_dir, "summary.json")) as f:
+        cache = json.load(f)["http_cache"]
+    assert cache["size_bytes"] <= cache["max_bytes"], cache
+    print(f"  bounded  entries={cache['entries']} size={cache['size_bytes']} evictions={cache['evictions']}")
+
+    # validators of a cached url must not be sent on to the url it redirects to
+    pool = fetch_and_process.ConnectionPool()
+    cache = fetch_and_process.HTTPCache(os.path.join(tmp, "cache_redirect"), 1024 * 1024)
+    url = f"http://127.0.0.1:{port}/redirect/1"
+    entries = [fetch_and_process.fetch_url(url, pool, cache=cache) for _ in range(2)]
+    assert [e["from_cache"] for e in entries] == [False, False], entries
+
+    # an entry evicted while its 304 is on the way is downloaded again instead of failing
+    url = f"http://127.0.0.1:{port}/cached/1"
+    fetch_and_process.fetch_url(url, pool, cache=cache)
+    send = pool.urlopen
+    def evicting_urlopen(url, headers=None, max_redirects=5):
+        resp = send(url, headers, max_redirects)
+        cache.entries.clear()
+        return resp
+    pool.urlopen = evicting_urlopen
+    entry = fetch_and_process.fetch_url(url, pool, cache=cache)
+    assert entry["error"] is None and entry["status_code"] == 200 and not entry["from_cache"], entry
+    assert entry["content_length"] == len(BODY * 20), entry
+    print("  redirect and eviction during revalidation ok")
+
+
+def check_fallback(port):
+    # urls the pool does not handle itself go through urllib.request as before
+    pool = fetch_and_process.ConnectionPool()
+    entry = fetch_and_process.fetch_url("example.com", pool)
+    assert entry["error"] == "unknown url type: 'example.com'", entry
+    entry = fetch_and_process.fetch_url("htp://example.com", pool)
+    assert entry["error"] == "<urlopen error unknown url type: htp>", entry
+
+    # with a proxy configured the request reaches the stub acting as proxy, not the unresolvable host
+    saved = dict(os.environ)
+    os.environ.update(http_proxy=f"http://127.0.0.1:{port}", no_proxy="")
+    try:
+        pool = fetch_and_process.ConnectionPool()
+    finally:
+        os.environ.clear()
+        os.environ.update(saved)
+    entry = fetch_and_process.fetch_url("http://proxied.invalid/page/1", pool)
+    assert entry["error"] is None and entry["content_length"] == len(BODY), entry
+    assert pool.stats()["connections_opened"] == 0
+    print("urllib fallback for other schemes and proxies ok")
+
+
+def main():
+    server = start_stub()
+    port = server.server_address[1]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        urls_path = os.path.join(tmp, "urls.txt")
+        with open(urls_path, "w") as f:
+            for i in range(NUM_URLS):
+                # a few hosts so the per-host cap matters
+                host = ["127.0.0.1", "localhost"][i % 2]
+                path = "/status/404" if i % 10 == 9 else f"/page/{i}"
+                f.write(f"http://{host}:{port}{path}\n")
+
+        baseline = None
+        print(f"{NUM_URLS} urls, {LATENCY_S * 1000:.0f} ms injected latency")
+        for concurrency in [1, 2, 4, 8, 16]:
+            out_dir = os.path.join(tmp, f"out_{concurrency}")
+            elapsed = run(urls_path, out_dir, ["--concurrency", str(concurrency), "--per-host", "8"])
+
+            with open(os.path.join(out_dir, "responses.json")) as f:
+                responses = json.load(f)
+            with open(os.path.join(out_dir, "summary.json")) as f:
+                summary = json.load(f)
+
+            # output must stay in input order and match the serial run
+            with open(urls_path) as f:
+                assert [r["url"] for r in responses] == [l.strip() for l in f if l.strip()]
+            outcome = (summary["successful_requests"], summary["failed_requests"], summary["total_bytes_downloaded"])
+            if baseline is None:
+                baseline = (elapsed, outcome)
+            assert outcome == baseline[1], outcome
+
+            pool = summary["connection_pool"]
+            print(f"  concurrency={concurrency:<3} {elapsed:6.2f}s  speedup x{baseline[0] / elapsed:.1f}"
+                  f"  connections opened={pool['connections_opened']} reused={pool['connections_reused']}")
+
+        bench_cache(port, tmp)
+        check_fallback(port)
+        bench_memory(port, tmp)
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
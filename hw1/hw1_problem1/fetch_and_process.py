@@ -4,9 +4,21 @@ import json
 import time
 import datetime
 import re
-import urllib.request
+import argparse
+import codecs
+import hashlib
+import itertools
+import tempfile
+import threading
 import urllib.error
-from collections import defaultdict
+import urllib.parse
+import urllib.request
+import http.client
+from collections import defaultdict, deque, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+CHUNK_SIZE = 64 * 1024
+TRAILING_WORD_RE = re.compile(r"\w+\Z")
 
 # --- functions ---
 
@@ -18,15 +30,522 @@ def word_count(text):
     # counts words in a text
     return len(re.findall(r"\w+", text))
 
+class StreamingWordCounter:
+    # counts \w+ words over byte chunks without holding the whole body
+
+    def __init__(self):
+        self.decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+        self.count = 0
+        self.tail = ""
+
+    def feed(self, data, final=False):
+        text = self.tail + self.decoder.decode(data, final=final)
+        self.tail = ""
+        if not final:
+            # a word touching the chunk end may continue in the next chunk; keeping its
+            # last character is enough to join it with the continuation and count it once
+            m = TRAILING_WORD_RE.search(text)
+            if m:
+                self.tail = text[-1]
+                text = text[:m.start()]
+        self.count += word_count(text)
+
+    def finish(self):
+        self.feed(b"", final=True)
+        return self.count
+
+def parse_args(argv):
+    # positional input/output plus optional concurrency settings
+    parser = argparse.ArgumentParser(
+        usage="python fetch_and_process.py <input_file> <output_dir> [--concurrency N] [--per-host N]"
+    )
+    parser.add_argument("input_file")
+    parser.add_argument("output_dir")
+    parser.add_argument("--concurrency", type=int, default=1,
+                        help="number of requests in flight at once (default 1 = serial)")
+    parser.add_argument("--per-host", type=int, default=4,
+                        help="max requests in flight to the same host (default 4)")
+    parser.add_argument("--pool-size", type=int, default=4,
+                        help="idle keep-alive connections kept per host, 0 disables reuse (default 4)")
+    parser.add_argument("--idle-timeout", type=float, default=30.0,
+                        help="seconds an idle pooled connection is kept before closing (default 30)")
+    parser.add_argument("--stream", action="store_true",
+                        help="write responses.jsonl incrementally instead of responses.json")
+    parser.add_argument("--resume", action="store_true",
+                        help="skip urls already recorded in checkpoint.jsonl and merge their results")
+    parser.add_argument("--cache-dir", default=None,
+                        help="on-disk HTTP cache for conditional GETs (default: no cache)")
+    parser.add_argument("--cache-max-mb", type=float, default=256,
+                        help="cache size bound in MiB, least recently used entries are evicted (default 256)")
+    args = parser.parse_args(argv)
+    if args.concurrency < 1 or args.per_host < 1:
+        parser.error("--concurrency and --per-host must be >= 1")
+    if args.pool_size < 0 or args.idle_timeout < 0:
+        parser.error("--pool-size and --idle-timeout must be >= 0")
+    if args.cache_max_mb <= 0:
+        parser.error("--cache-max-mb must be > 0")
+    return args
+
+class HostLimiter:
+    # caps in-flight requests per host with one semaphore per netloc
+
+    def __init__(self, per_host):
+        self.per_host = per_host
+        self.lock = threading.Lock()
+        self.semaphores = {}
+
+    def get(self, url):
+        host = urllib.parse.urlsplit(url).netloc.lower()
+        with self.lock:
+            if host not in self.semaphores:
+                self.semaphores[host] = threading.BoundedSemaphore(self.per_host)
+            return self.semaphores[host]
+
+class PooledResponse:
+    # wraps an http.client response and hands the connection back to the pool on close
+
+    def __init__(self, pool, key, conn, resp, url):
+        self.pool = pool
+        self.key = key
+        self.conn = conn
+        self.resp = resp
+        self.url = url
+        self.status = resp.status
+        self.headers = resp.headers
+
+    def getcode(self):
+        return self.status
+
+    def read(self, amt=None):
+        return self.resp.read(amt)
+
+    def close(self):
+        if self.conn is None:
+            return
+        # only fully drained responses leave the connection in a reusable state
+        if self.resp.isclosed() and not self.resp.will_close:
+            self.pool.checkin(self.key, self.conn)
+        else:
+            self.conn.close()
+        self.conn = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class ConnectionPool:
+    # keep-alive HTTP connections reused per (scheme, host, port)
+
+    REDIRECT_CODES = (301, 302, 303, 307, 308)
+
+    def __init__(self, pool_size=4, idle_timeout=30.0, timeout=10):
+        self.pool_size = pool_size
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        # proxy settings are read once, like the opener urllib.request.urlopen builds on first use
+        self.proxies = urllib.request.getproxies()
+        self.opener = urllib.request.build_opener(urllib.request.ProxyHandler(self.proxies))
+        self.lock = threading.Lock()
+        self.idle = defaultdict(list)
+        self.opened = 0
+        self.reused = 0
+
+    def connect(self, key):
+        scheme, host, port = key
+        cls = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+        with self.lock:
+            self.opened += 1
+        return cls(host, port, timeout=self.timeout)
+
+    def checkout(self, key):
+        # returns (connection, reused) - newest idle connection first, expired ones dropped
+        now = time.monotonic()
+        with self.lock:
+            conns = self.idle[key]
+            while conns:
+                conn, last_used = conns.pop()
+                if now - last_used <= self.idle_timeout:
+                    self.reused += 1
+                    return conn, True
+                conn.close()
+        return self.connect(key), False
+
+    def checkin(self, key, conn):
+        with self.lock:
+            if len(self.idle[key]) < self.pool_size:
+                self.idle[key].append((conn, time.monotonic()))
+                return
+        conn.close()
+
+    def close(self):
+        with self.lock:
+            for conns in self.idle.values():
+                for conn, _ in conns:
+                    conn.close()
+            self.idle.clear()
+
+    def stats(self):
+        with self.lock:
+            return {
+                "connections_opened": self.opened,
+                "connections_reused": self.reused,
+                "pool_size": self.pool_size,
+                "idle_timeout_s": self.idle_timeout,
+            }
+
+    def _send(self, key, target, headers):
+        # a reused connection the server already closed is retried once on a fresh one
+        conn, reused = self.checkout(key)
+        while True:
+            try:
+                conn.request("GET", target, headers=headers)
+                return conn, conn.getresponse()
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                conn.close()
+                if not reused:
+                    raise
+                conn, reused = self.connect(key), False
+            except Exception:
+                conn.close()
+                raise
+
+    def direct(self, parts):
+        # only plain http(s) without a proxy goes over pooled connections
+        if parts.scheme not in ("http", "https"):
+            return False
+        return parts.scheme not in self.proxies or urllib.request.proxy_bypass(parts.netloc)
+
+    def fallback(self, url, headers):
+        # other schemes and proxied hosts keep urllib's handling and error messages
+        req = urllib.request.Request(url, headers=headers or {}, method="GET")
+        try:
+            return self.opener.open(req, timeout=self.timeout)
+        except urllib.error.HTTPError as e:
+            if e.code != 304:
+                raise
+            return e  # the error doubles as the response, as a pooled 304 would be returned
+
+    def urlopen(self, url, headers=None, max_redirects=5):
+        # GET with urlopen-like semantics: follows redirects, raises HTTPError for 4xx/5xx;
+        # headers go with the first request only, since validators belong to the url asked for
+        for _ in range(max_redirects + 1):
+            parts = urllib.parse.urlsplit(url)
+            if not self.direct(parts):
+                return self.fallback(url, headers)
+            port = parts.port or (443 if parts.scheme == "https" else 80)
+            key = (parts.scheme, parts.hostname, port)
+            target = parts.path or "/"
+            if parts.query:
+                target += "?" + parts.query
+
+            try:
+                conn, resp = self._send(key, target, dict(headers or {}, Connection="keep-alive"))
+            except OSError as e:
+                raise urllib.error.URLError(e)
+
+            wrapped = PooledResponse(self, key, conn, resp, url)
+            location = resp.getheader("Location")
+            if resp.status in self.REDIRECT_CODES and location:
+                resp.read()
+                wrapped.close()
+                url = urllib.parse.urljoin(url, location)
+                headers = None
+                continue
+            if resp.status >= 400:
+                resp.read()
+                wrapped.close()
+                raise urllib.error.HTTPError(url, resp.status, resp.reason, resp.headers, None)
+            return wrapped
+
+        raise urllib.error.URLError(f"too many redirects: {url}")
+
+class CacheWriter:
+    # tees a response body into a temp file; the cache entry is committed only if the body was fully read
+
+    def __init__(self, cache, url, resp, meta):
+        self.cache = cache
+        self.url = url
+        self.resp = resp
+        self.meta = meta
+        self.tmp = tempfile.NamedTemporaryFile(dir=cache.cache_dir, suffix=".tmp", delete=False)
+        self.complete = False
+
+    def read(self, amt=None):
+        chunk = self.resp.read(amt)
+        if chunk:
+            self.tmp.write(chunk)
+            self.meta["size"] += len(chunk)
+        else:
+            self.complete = True
+        return chunk
+
+    def close(self):
+        self.tmp.close()
+        if self.complete:
+            self.cache.store(self.url, self.meta, self.tmp.name)
+        else:
+            os.remove(self.tmp.name)
+
+class HTTPCache:
+    # on-disk cache of responses with validators, keyed by url and bounded by LRU eviction
+
+    def __init__(self, cache_dir, max_bytes):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.index_path = os.path.join(cache_dir, "index.json")
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()  # least recently used first
+        self.hits = 0
+        self.misses = 0
+        self.bytes_saved = 0
+        self.evictions = 0
+
+        os.makedirs(cache_dir, exist_ok=True)
+        if os.path.exists(self.index_path):
+            with open(self.index_path) as f:
+                for key, meta in json.load(f).items():
+                    if os.path.exists(self.body_path(key)):
+                        self.entries[key] = meta
+        # bodies and temp files left behind by an interrupted run are not in the index
+        for name in os.listdir(cache_dir):
+            if name.endswith(".tmp") or (name.endswith(".body") and name[:-5] not in self.entries):
+                os.remove(os.path.join(cache_dir, name))
+        self.size = sum(meta["size"] for meta in self.entries.values())
+
+    def key(self, url):
+        return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+    def body_path(self, key):
+        return os.path.join(self.cache_dir, key + ".body")
+
+    def lookup(self, url):
+        with self.lock:
+            meta = self.entries.get(self.key(url))
+            return dict(meta) if meta else None
+
+    def conditional_headers(self, meta):
+        headers = {}
+        if meta and meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta and meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+        return headers
+
+    def open(self, pool, url):
+        # conditional GET through the pool; returns (response, body reader, cached meta or None)
+        resp = pool.urlopen(url, self.conditional_headers(self.lookup(url)))
+        if resp.getcode() != 304:
+            return resp, self.wrap(url, resp), None
+        resp.read()
+        hit = self.open_hit(url)
+        if hit:
+            meta, body = hit
+            return resp, body, meta
+        # evicted after the validators were sent: ask again for the full body
+        resp.close()
+        resp = pool.urlopen(url)
+        return resp, self.wrap(url, resp), None
+
+    def open_hit(self, url):
+        # opens the cached body for a 304, or None once evicted; the open handle survives a later eviction
+        key = self.key(url)
+        with self.lock:
+            if key not in self.entries:
+                return None
+            self.entries.move_to_end(key)
+            meta = self.entries[key]
+            self.hits += 1
+            self.bytes_saved += meta["size"]
+            return dict(meta), open(self.body_path(key), "rb")
+
+    def wrap(self, url, resp):
+        # returns the body reader for a full response, caching it when the server sent validators
+        with self.lock:
+            self.misses += 1
+        etag = resp.headers.get("ETag")
+        last_modified = resp.headers.get("Last-Modified")
+        if not (etag or last_modified):
+            return resp
+        meta = {
+            "url": url,
+            "etag": etag,
+            "last_modified": last_modified,
+            "status": resp.getcode(),
+            "content_type": resp.headers.get("Content-Type", ""),
+            "size": 0,
+        }
+        return CacheWriter(self, url, resp, meta)
+
+    def store(self, url, meta, tmp_path):
+        key = self.key(url)
+        with self.lock:
+            if meta["size"] > self.max_bytes:
+                os.remove(tmp_path)
+                return
+            os.replace(tmp_path, self.body_path(key))
+            if key in self.entries:
+                self.size -= self.entries.pop(key)["size"]
+            self.entries[key] = meta
+            self.size += meta["size"]
+            while self.size > self.max_bytes:
+                old_key, old_meta = self.entries.popitem(last=False)
+                os.remove(self.body_path(old_key))
+                self.size -= old_meta["size"]
+                self.evictions += 1
+
+    def close(self):
+        with self.lock:
+            tmp_path = self.index_path + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(self.entries, f)
+            os.replace(tmp_path, self.index_path)
+
+    def stats(self):
+        with self.lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "bytes_saved": self.bytes_saved,
+                "evictions": self.evictions,
+                "entries": len(self.entries),
+                "size_bytes": self.size,
+                "max_bytes": self.max_bytes,
+            }
+
+def fetch_url(url, pool, limiter=None, cache=None):
+    # fetches a single url and returns its response entry
+    entry = {
+        "url": url,
+        "status_code": None,
+        "response_time_ms": None,
+        "content_length": None,
+        "word_count": None,
+        "timestamp": current_datestamp(),
+        "error": None,
+    }
+    if cache:
+        # bodies replayed from the cache on a 304 are not counted as downloaded
+        entry["from_cache"] = False
+
+    sem = limiter.get(url) if limiter else None
+    if sem:
+        sem.acquire()
+    try:
+        entry["timestamp"] = current_datestamp()
+        start = time.time()
+        if cache:
+            resp, body, hit = cache.open(pool, url)
+        else:
+            resp = body = pool.urlopen(url)
+            hit = None
+        with resp:
+            end = time.time()
+
+            entry["status_code"] = resp.getcode()
+            elapsed_ms = (end - start) * 1000
+            entry["response_time_ms"] = round(elapsed_ms, 2)
+
+            # content type
+            content_type = resp.headers.get("Content-Type", "")
+
+            if hit:
+                # not modified: the cached body is processed as if it was downloaded again
+                entry["status_code"] = hit["status"]
+                entry["from_cache"] = True
+                content_type = hit["content_type"]
+
+            counter = StreamingWordCounter() if "text" in content_type.lower() else None
+
+            # body is consumed chunk by chunk so memory does not grow with response size
+            content_length = 0
+            try:
+                while True:
+                    chunk = body.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    content_length += len(chunk)
+                    if counter:
+                        counter.feed(chunk)
+            finally:
+                if body is not resp:
+                    body.close()
+            entry["content_length"] = content_length
+
+            if counter:
+                try:
+                    entry["word_count"] = counter.finish()
+                except Exception as e:
+                    entry["word_count"] = None
+
+    except Exception as e:
+        entry["error"] = str(e)
+    finally:
+        if sem:
+            sem.release()
+
+    return entry
+
+def fetch_all(urls, pool, concurrency=1, per_host=4, cache=None):
+    # yields entries in input order; with concurrency > 1 requests run on a thread pool
+    if concurrency <= 1:
+        for url in urls:
+            yield fetch_url(url, pool, cache=cache)
+        return
+
+    limiter = HostLimiter(per_host)
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        # bounded window of futures keeps input order without queueing the whole url list
+        window = deque()
+        for url in urls:
+            window.append(executor.submit(fetch_url, url, pool, limiter, cache))
+            if len(window) >= concurrency * 2:
+                yield window.popleft().result()
+        while window:
+            yield window.popleft().result()
+
+def read_checkpoint(path):
+    # returns (entries, valid_bytes); a torn last line left by a crash is not counted
+    count = 0
+    valid_bytes = 0
+    with open(path, "rb") as f:
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            try:
+                json.loads(line)
+            except ValueError:
+                break
+            count += 1
+            valid_bytes += len(line)
+    return count, valid_bytes
+
+def replay_checkpoint(path, urls):
+    # yields journaled entries, consuming the matching urls so fetching picks up after them
+    with open(path, "r") as f:
+        for line in f:
+            entry = json.loads(line)
+            url = next(urls, None)
+            if url != entry["url"]:
+                sys.stderr.write(f"Checkpoint does not match input file at {url}\n")
+                sys.exit(1)
+            yield entry
+
+def journaled(entries, journal):
+    # appends each finished entry to the checkpoint before handing it on
+    for entry in entries:
+        journal.write(json.dumps(entry) + "\n")
+        journal.flush()
+        yield entry
+
 # --- logic ---
 
-def main():
-    if len(sys.argv) != 3:
-        sys.stderr.write("Usage: python fetch_and_process.py <input_file> <output_dir>\n")
-        sys.exit(1)
+def main(argv=None):
+    args = parse_args(sys.argv[1:] if argv is None else argv)
 
-    input_file = sys.argv[1]
-    output_dir = sys.argv[2]
+    input_file = args.input_file
+    output_dir = args.output_dir
 
     if not os.path.exists(input_file):
         sys.stderr.write(f"Input file not found: {input_file}\n")
@@ -35,81 +554,83 @@ def main():
     os.makedirs(output_dir, exist_ok=True)
 
     responses = []
+    total_urls = 0
     status_distribution = defaultdict(int)
     total_bytes = 0
+    cached_bytes = 0
     total_time = 0.0
     success_count = 0
     fail_count = 0
 
     errors_path = os.path.join(output_dir, "errors.log")
-    responses_path = os.path.join(output_dir, "responses.json")
+    responses_path = os.path.join(output_dir, "responses.jsonl" if args.stream else "responses.json")
     summary_path = os.path.join(output_dir, "summary.json")
+    checkpoint_path = os.path.join(output_dir, "checkpoint.jsonl")
+
+    # results are journaled in input order, so the checkpoint is always a prefix of the url list
+    resumed = 0
+    if args.resume and os.path.exists(checkpoint_path):
+        resumed, valid_bytes = read_checkpoint(checkpoint_path)
+        with open(checkpoint_path, "r+b") as f:
+            f.truncate(valid_bytes)
 
     start_time = current_datestamp()
+    pool = ConnectionPool(args.pool_size, args.idle_timeout)
+    cache = HTTPCache(args.cache_dir, int(args.cache_max_mb * 1024 * 1024)) if args.cache_dir else None
 
-    with open(input_file, "r") as f, open(errors_path, "w") as err_log:
-        urls = [line.strip() for line in f if line.strip()]
+    with open(input_file, "r") as f, open(errors_path, "w") as err_log, \
+            open(checkpoint_path, "a" if resumed else "w") as journal, \
+            open(responses_path, "w") if args.stream else open(os.devnull, "w") as jsonl:
+        # urls are read lazily so large input files are never held in memory
+        urls = (line.strip() for line in f if line.strip())
 
-        for url in urls:
-            entry = {
-                "url": url,
-                "status_code": None,
-                "response_time_ms": None,
-                "content_length": None,
-                "word_count": None,
-                "timestamp": current_datestamp(),
-                "error": None,
-            }
+        entries = itertools.chain(
+            replay_checkpoint(checkpoint_path, urls) if resumed else [],
+            journaled(fetch_all(urls, pool, args.concurrency, args.per_host, cache), journal),
+        )
 
-            try:
-                req = urllib.request.Request(url, method="GET")
-                start = time.time()
-                with urllib.request.urlopen(req, timeout=10) as resp:
-                    end = time.time()
-
-                    entry["status_code"] = resp.getcode()
-                    elapsed_ms = (end - start) * 1000
-                    entry["response_time_ms"] = round(elapsed_ms, 2)
-
-                    body = resp.read()
-                    entry["content_length"] = len(body)
-
-                    # content type
-                    content_type = resp.headers.get("Content-Type", "")
-                    if "text" in content_type.lower():
-                        try:
-                            decoded = body.decode("utf-8", errors="ignore")
-                            entry["word_count"] = word_count(decoded)
-                        except Exception as e:
-                            entry["word_count"] = None
-
-                    # aggregate stats
-                    success_count += 1
+        for entry in entries:
+            total_urls += 1
+            if entry["error"] is None:
+                # aggregate stats
+                success_count += 1
+                if entry.get("from_cache"):
+                    cached_bytes += entry["content_length"]
+                else:
                     total_bytes += entry["content_length"]
-                    total_time += entry["response_time_ms"]
-                    status_distribution[str(entry["status_code"])] += 1
-
-            except Exception as e:
-                entry["error"] = str(e)
+                total_time += entry["response_time_ms"]
+                status_distribution[str(entry["status_code"])] += 1
+            else:
                 fail_count += 1
-                err_log.write(f"{url} - {str(e)}\n")
+                err_log.write(f"{entry['url']} - {entry['error']}\n")
 
-            responses.append(entry)
+            if args.stream:
+                jsonl.write(json.dumps(entry) + "\n")
+            else:
+                responses.append(entry)
 
+    pool.close()
+    if cache:
+        cache.close()
     end_time = current_datestamp()
 
     # write responses.json
-    with open(responses_path, "w") as f:
-        json.dump(responses, f, indent=2)
+    if not args.stream:
+        with open(responses_path, "w") as f:
+            json.dump(responses, f, indent=2)
 
     # write summary.json
     summary = {
-        "total_urls": len(urls),
+        "total_urls": total_urls,
         "successful_requests": success_count,
         "failed_requests": fail_count,
         "average_response_time_ms": round(total_time / success_count, 2) if success_count > 0 else None,
         "total_bytes_downloaded": total_bytes,
+        "total_bytes_from_cache": cached_bytes,
         "status_code_distribution": dict(status_distribution),
+        "connection_pool": pool.stats(),
+        "resumed_urls": resumed,
+        "http_cache": cache.stats() if cache else None,
         "processing_start": start_time,
         "processing_end": end_time,
     }
@@ -1,5 +1,10 @@
 import sys
 import os
+import atexit
+import argparse
+import hashlib
+import tempfile
+import threading
 import urllib.request
 import urllib.error
 import xml.etree.ElementTree as ET
@@ -7,9 +12,20 @@ from datetime import datetime, timezone
 import time
 import re
 import json
-from collections import Counter, defaultdict
+from array import array
+from collections import Counter, OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain, islice
+from multiprocessing import Pool
 import urllib.parse
 
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional: only needed for --format parquet/arrow
+    pa = None
+    pq = None
+
 
 """
 ArXiv Paper Metadata Processor
@@ -30,96 +46,389 @@ STOPWORDS = {
 }
 
 
-def log(message, output_dir):
-    # log message with timestamp
+class BufferedLog:
+    """processing.log kept open behind a write buffer.
+
+    Lines are timestamped when logged and reach the file when the buffer fills, on
+    flush() and at interpreter exit, instead of costing an open/append/close each.
+    """
+
+    def __init__(self, path, buffer_size=64 * 1024):
+        self.f = open(path, "a", encoding="utf-8", buffering=buffer_size)
+        self.lock = threading.Lock()  # harvest threads log concurrently
+
+    def write(self, line, flush=False):
+        with self.lock:
+            self.f.write(line)
+            if flush:
+                self.f.flush()
+
+    def flush(self):
+        with self.lock:
+            self.f.flush()
+
+    def close(self):
+        with self.lock:
+            self.f.close()
+
+
+LOGS = {}
+LOGS_LOCK = threading.Lock()
+
+
+def log(message, output_dir, flush=False):
+    # log message with timestamp; flush=True writes it out immediately (used for errors)
     ts = datetime.now(timezone.utc).isoformat()
     line = f"[{ts}] {message}\n"
     log_path = os.path.join(output_dir, "processing.log")
-    with open(log_path, "a", encoding="utf-8") as f:
-        f.write(line)
-
+    logger = LOGS.get(log_path)
+    if logger is None:
+        with LOGS_LOCK:
+            logger = LOGS.get(log_path)
+            if logger is None:
+                logger = LOGS[log_path] = BufferedLog(log_path)
+    logger.write(line, flush)
+
+
+def flush_logs():
+    for logger in list(LOGS.values()):
+        logger.flush()
+
+
+@atexit.register
+def close_logs():
+    # also runs after sys.exit() and uncaught exceptions, so nothing buffered is lost
+    with LOGS_LOCK:
+        for logger in LOGS.values():
+            logger.close()
+        LOGS.clear()
+
+
+class TokenBucket:
+    """Token-bucket rate limiter shared by the harvesting threads.
+
+    Allows `rate` requests per second on average and at most `burst` back to back.
+    """
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.capacity = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class QueryCache:
+    """On-disk cache of raw Atom responses keyed by (api url, query, start, max_results).
+
+    Bodies are stored once under the sha256 of their content, so identical responses to
+    different requests share a file. Entries older than ttl seconds are refetched, and
+    the least recently used ones are evicted once the bodies exceed max_bytes. In offline
+    mode only the cache is consulted and expired entries are still served.
+    """
+
+    def __init__(self, cache_dir, max_bytes, ttl, offline=False):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.offline = offline
+        self.index_path = os.path.join(cache_dir, "index.json")
+        self.lock = threading.Lock()  # harvest threads share the cache
+        self.entries = OrderedDict()  # request key -> meta, least recently used first
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.stored = 0
+        self.evictions = 0
+
+        os.makedirs(cache_dir, exist_ok=True)
+        if os.path.exists(self.index_path):
+            with open(self.index_path) as f:
+                for key, meta in json.load(f).items():
+                    if os.path.exists(self.body_path(meta["sha256"])):
+                        self.entries[key] = meta
+        # bodies and temp files left behind by an interrupted run are not referenced by the index
+        referenced = {meta["sha256"] for meta in self.entries.values()}
+        for name in os.listdir(cache_dir):
+            if name.endswith(".tmp") or (name.endswith(".xml") and name[:-4] not in referenced):
+                os.remove(os.path.join(cache_dir, name))
+        self.sizes = {meta["sha256"]: meta["size"] for meta in self.entries.values()}
+        self.size = sum(self.sizes.values())
+
+    def key(self, api_url, query, start, max_results):
+        return hashlib.sha256(json.dumps([api_url, query, start, max_results]).encode("utf-8")).hexdigest()
+
+    def body_path(self, digest):
+        return os.path.join(self.cache_dir, digest + ".xml")
+
+    def open_body(self, key):
+        # opens the cached body, or None when it is missing or (online) expired;
+        # the open handle survives a later eviction
+        with self.lock:
+            meta = self.entries.get(key)
+            if meta is not None and not self.offline and time.time() - meta["stored"] > self.ttl:
+                self.expired += 1
+                meta = None
+            if meta is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return open(self.body_path(meta["sha256"]), "rb")
+
+    def wrap(self, key, resp):
+        # returns a reader over resp that stores the body under key once it has been read to the end
+        return CacheTee(self, key, resp)
+
+    def put(self, key, tmp_path, digest, size):
+        # takes over tmp_path, a complete body with the given sha256 and size
+        with self.lock:
+            if size > self.max_bytes:
+                os.remove(tmp_path)
+                return
+            if digest in self.sizes:
+                os.remove(tmp_path)  # the same body is already stored for another request
+            else:
+                os.replace(tmp_path, self.body_path(digest))
+                self.sizes[digest] = size
+                self.size += size
+            old = self.entries.pop(key, None)
+            self.entries[key] = {"sha256": digest, "size": size, "stored": time.time()}
+            if old is not None:
+                self.release(old["sha256"])
+            self.stored += 1
+            while self.size > self.max_bytes:
+                _, old = self.entries.popitem(last=False)
+                self.release(old["sha256"])
+                self.evictions += 1
+
+    def release(self, digest):
+        # drops a body once no entry refers to it any more
+        if any(meta["sha256"] == digest for meta in self.entries.values()):
+            return
+        os.remove(self.body_path(digest))
+        self.size -= self.sizes.pop(digest)
+
+    def close(self):
+        with self.lock:
+            tmp_path = self.index_path + ".tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(self.entries, f)
+            os.replace(tmp_path, self.index_path)
+
+    def stats(self):
+        with self.lock:
+            return (f"hits={self.hits} misses={self.misses} expired={self.expired} stored={self.stored}"
+                    f" evictions={self.evictions} entries={len(self.entries)} bodies={len(self.sizes)}"
+                    f" size_bytes={self.size} max_bytes={self.max_bytes}")
+
+
+class CacheTee:
+    # passes a response through while writing it to a temp file; the body is cached only if fully read
+
+    def __init__(self, cache, key, resp):
+        self.cache = cache
+        self.key = key
+        self.resp = resp
+        self.tmp = tempfile.NamedTemporaryFile(dir=cache.cache_dir, suffix=".tmp", delete=False)
+        self.digest = hashlib.sha256()
+        self.size = 0
+        self.complete = False
+
+    def read(self, amt=None):
+        chunk = self.resp.read(amt)
+        if chunk:
+            self.tmp.write(chunk)
+            self.digest.update(chunk)
+            self.size += len(chunk)
+        else:
+            self.complete = True
+        return chunk
+
+    def close(self):
+        self.resp.close()
+        self.tmp.close()
+        if self.complete:
+            self.cache.put(self.key, self.tmp.name, self.digest.hexdigest(), self.size)
+        else:
+            os.remove(self.tmp.name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def open_arxiv_feed(query, max_results, output_dir, start=0, limiter=None, api_url=ARXIV_API_URL, cache=None):
+    # opens the Atom XML from ArXiv API as a binary stream, with retry on 429; a cache answers repeated requests
+    if cache:
+        key = cache.key(api_url, query, start, max_results)
+        body = cache.open_body(key)
+        if body is not None:
+            log(f"Cache hit: start={start} max_results={max_results}", output_dir)
+            return body
+        if cache.offline:
+            log(f"Offline and not cached: start={start} max_results={max_results}", output_dir, flush=True)
+            sys.exit(1)
+        return cache.wrap(key, open_arxiv_feed(query, max_results, output_dir, start, limiter, api_url))
 
-def fetch_arxiv_data(query, max_results, output_dir):
-    # fetches XML from ArXiv API with retry on 429
     query_encoded = urllib.parse.quote(query)  # pase query
-    url = f"{ARXIV_API_URL}?search_query={query_encoded}&start=0&max_results={max_results}"
+    url = f"{api_url}?search_query={query_encoded}&start={start}&max_results={max_results}"
 
     attempts = 0
     while attempts < 3:
+        if limiter:
+            limiter.acquire()
         try:
-            with urllib.request.urlopen(url) as response:
-                if response.status == 429:
-                    log("rate limit hit, waiting 3 seconds ...", output_dir)
-                    time.sleep(3)
-                    attempts += 1
-                    continue
-                return response.read()
+            response = urllib.request.urlopen(url)
+            if response.status == 429:
+                response.close()
+                log("rate limit hit, waiting 3 seconds ...", output_dir)
+                time.sleep(3)
+                attempts += 1
+                continue
+            # the body is left unread so the parser can consume it as it arrives
+            return response
         except urllib.error.HTTPError as e:
             if e.code == 429:
                 log("HTTP 429 received, retrying ...", output_dir)
                 time.sleep(3)
                 attempts += 1
                 continue
-            log(f"HTTP error: {e}", output_dir)
+            log(f"HTTP error: {e}", output_dir, flush=True)
             sys.exit(1)
         except urllib.error.URLError as e:
-            log(f"Network error: {e}", output_dir)
+            log(f"Network error: {e}", output_dir, flush=True)
             sys.exit(1)
 
-    log("Failed after 3 attempts dueto rate limit", output_dir)
+    log("Failed after 3 attempts dueto rate limit", output_dir, flush=True)
     sys.exit(1)
 
 
-def parse_arxiv_xml(xml_data, output_dir):
-    # parses XML and extracts metadata for each paper
-    papers = []
-    try:
-        root = ET.fromstring(xml_data)
-    except ET.ParseError as e:
-        log(f"Invalid XML from API: {e}", output_dir)
-        return papers
+ATOM_NS = {"atom": "http://www.w3.org/2005/Atom"}
+ENTRY_TAG = "{http://www.w3.org/2005/Atom}entry"
+TOTAL_RESULTS_TAG = "{http://a9.com/-/spec/opensearch/1.1/}totalResults"
 
-    ns = {"atom": "http://www.w3.org/2005/Atom"}
 
-    for entry in root.findall("atom:entry", ns):
-        try:
-            arxiv_id = entry.find("atom:id", ns).text.split("/")[-1]
-            title = entry.find("atom:title", ns).text.strip()
-            authors = [a.find("atom:name", ns).text for a in entry.findall("atom:author", ns)]
-            abstract = entry.find("atom:summary", ns).text.strip()
-            categories = [c.attrib["term"] for c in entry.findall("atom:category", ns)]
-            published = entry.find("atom:published", ns).text
-            updated = entry.find("atom:updated", ns).text
-
-            if not (arxiv_id and title and authors and abstract):
-                raise ValueError("Missing required field")
-
-            abstract_stats = analyze_abstract(abstract)
-
-            paper = {
-                "arxiv_id": arxiv_id,
-                "title": title,
-                "authors": authors,
-                "abstract": abstract,
-                "categories": categories,
-                "published": published,
-                "updated": updated,
-                "abstract_stats": {
-                    "total_words": abstract_stats["total_words"],
-                    "unique_words": abstract_stats["unique_words"],
-                    "total_sentences": abstract_stats["total_sentences"],
-                    "avg_words_per_sentence": abstract_stats["avg_words_per_sentence"],
-                    "avg_word_length": abstract_stats["avg_word_length"],
-                },
-            }
-            papers.append((paper, abstract_stats))
-            log(f"Processing paper: {arxiv_id}", output_dir)
-
-        except Exception as e:
-            log(f"Skipping paper due to missing/invalid field: {e}", output_dir)
-            continue
-
-    return papers
+def entry_fields(entry, ns=ATOM_NS):
+    # metadata of one <entry>; raises if a field is missing
+    arxiv_id = entry.find("atom:id", ns).text.split("/")[-1]
+    title = entry.find("atom:title", ns).text.strip()
+    authors = [a.find("atom:name", ns).text for a in entry.findall("atom:author", ns)]
+    abstract = entry.find("atom:summary", ns).text.strip()
+    categories = [c.attrib["term"] for c in entry.findall("atom:category", ns)]
+    published = entry.find("atom:published", ns).text
+    updated = entry.find("atom:updated", ns).text
+
+    if not (arxiv_id and title and authors and abstract):
+        raise ValueError("Missing required field")
+
+    return {
+        "arxiv_id": arxiv_id,
+        "title": title,
+        "authors": authors,
+        "abstract": abstract,
+        "categories": categories,
+        "published": published,
+        "updated": updated,
+    }
+
+
+def build_paper(fields):
+    # runs the abstract analysis for one entry's metadata; returns (paper, abstract_stats)
+    abstract_stats = analyze_abstract(fields["abstract"])
+
+    paper = dict(fields)
+    paper["abstract_stats"] = {
+        "total_words": abstract_stats["total_words"],
+        "unique_words": abstract_stats["unique_words"],
+        "total_sentences": abstract_stats["total_sentences"],
+        "avg_words_per_sentence": abstract_stats["avg_words_per_sentence"],
+        "avg_word_length": abstract_stats["avg_word_length"],
+    }
+    return paper, abstract_stats
+
+
+def iter_arxiv_entries(source, output_dir, feed_info=None):
+    """Yield the metadata of each <entry> of an Atom feed as soon as it is parsed.
+
+    source is a path or binary file object. Every finished entry is dropped from the tree,
+    so memory does not grow with the size of the feed. If given, feed_info receives
+    "total_results" from the feed header.
+    """
+    try:
+        context = ET.iterparse(source, events=("start", "end"))
+        _, root = next(context)
+        for event, elem in context:
+            if event != "end":
+                continue
+            if elem.tag == TOTAL_RESULTS_TAG and feed_info is not None:
+                try:
+                    feed_info["total_results"] = int(elem.text)
+                except (TypeError, ValueError):
+                    pass
+            elif elem.tag == ENTRY_TAG:
+                try:
+                    fields = entry_fields(elem)
+                except Exception as e:
+                    log(f"Skipping paper due to missing/invalid field: {e}", output_dir)
+                else:
+                    yield fields
+                # entries hang off the root, so clearing it releases everything parsed so far
+                root.clear()
+    except ET.ParseError as e:
+        log(f"Invalid XML from API: {e}", output_dir, flush=True)
+
+
+def iter_arxiv_xml(source, output_dir, feed_info=None):
+    # streams (paper, abstract_stats) for each valid entry, analyzing abstracts in this process
+    for fields in iter_arxiv_entries(source, output_dir, feed_info):
+        paper, abstract_stats = build_paper(fields)
+        log(f"Processing paper: {paper['arxiv_id']}", output_dir)
+        yield paper, abstract_stats
+
+
+def harvest(query, max_results, output_dir, page_size=1000, parallel=4, limiter=None, api_url=ARXIV_API_URL,
+            cache=None):
+    """Yield pages of up to page_size parsed entries (see entry_fields), in API result order.
+
+    The first page tells how many results the query has; the remaining start/max_results
+    windows are fetched and parsed by `parallel` threads that share one rate limiter.
+    At most 2 * parallel pages are in flight, so pages finishing early wait only briefly.
+    """
+    def fetch_page(start, size, feed_info=None):
+        with open_arxiv_feed(query, size, output_dir, start, limiter, api_url, cache) as feed:
+            entries = list(iter_arxiv_entries(feed, output_dir, feed_info))
+        log(f"Fetched page start={start}: {len(entries)} papers", output_dir)
+        return entries
+
+    first_size = min(page_size, max_results)
+    feed_info = {}
+    yield fetch_page(0, first_size, feed_info)
+    total = feed_info.get("total_results")
+    limit = max_results if total is None else min(max_results, total)
+
+    with ThreadPoolExecutor(max_workers=parallel) as pool:
+        window = deque()
+        for start in range(first_size, limit, page_size):
+            window.append(pool.submit(fetch_page, start, min(page_size, limit - start)))
+            if len(window) >= 2 * parallel:
+                yield window.popleft().result()
+        while window:
+            yield window.popleft().result()
 
 
 def analyze_abstract(text):
@@ -158,6 +467,8 @@ def analyze_abstract(text):
     return {
         "total_words": total_words,
         "unique_words": unique_words,
+        # lowercase word -> count, so aggregation never tokenizes the abstract again
+        "word_counts": Counter(words_lower),
         "top_20_words": top_20,
         "avg_word_length": avg_word_length,
         "total_sentences": total_sentences,
@@ -172,113 +483,361 @@ def analyze_abstract(text):
     }
 
 
-def aggregate_analysis(query, papers, output_dir):
-    # creates analysis across all papers
-    total_abstracts = len(papers)
-    total_words = sum(p[1]["total_words"] for p in papers)
-    all_words = []
-    category_distribution = defaultdict(int)
-    uppercase_terms, numeric_terms, hyphenated_terms = set(), set(), set()
-
-    longest_abs = 0
-    shortest_abs = float("inf")
-
-    for p, stats in papers:
-        all_words.extend([w.lower() for w in re.findall(r"\b[\w\-]+\b", p["abstract"])])
-        for cat in p["categories"]:
-            category_distribution[cat] += 1
-
-        longest_abs = max(longest_abs, stats["total_words"])
-        shortest_abs = min(shortest_abs, stats["total_words"])
-
-        uppercase_terms.update(stats["technical_terms"]["uppercase_terms"])
-        numeric_terms.update(stats["technical_terms"]["numeric_terms"])
-        hyphenated_terms.update(stats["technical_terms"]["hyphenated_terms"])
-
-    unique_words_global = len(set(all_words))
-    avg_abstract_length = total_words / total_abstracts if total_abstracts else 0
-
-    freq_global = Counter([w for w in all_words if w not in STOPWORDS])
-    top_50 = [
-        {
-            "word": w,
-            "frequency": c,
-            "documents": sum(
-                1 for _, s in papers
-                if w in [x.lower() for x in re.findall(r"\b[\w\-]+\b", _["abstract"])]
-            )
+class AbstractAggregate:
+    """Corpus-wide abstract statistics, built one paper at a time.
+
+    Every abstract is tokenized once, by analyze_abstract. Its distinct lowercase words go
+    into an inverted index (word -> postings of document numbers), so a word's document
+    frequency is the length of its postings.
+    """
+
+    def __init__(self):
+        self.total_abstracts = 0
+        self.total_words = 0
+        self.word_counts = Counter()
+        self.postings = {}
+        self.category_distribution = Counter()
+        self.uppercase_terms, self.numeric_terms, self.hyphenated_terms = set(), set(), set()
+        self.longest_abs = 0
+        self.shortest_abs = float("inf")
+
+    def add(self, paper, stats):
+        doc = self.total_abstracts
+        self.total_abstracts += 1
+        self.total_words += stats["total_words"]
+        word_counts, index = self.word_counts, self.postings
+        for w, c in stats["word_counts"].items():
+            postings = index.get(w)
+            if postings is None:
+                postings = index[w] = array("I")
+                word_counts[w] = c
+            else:
+                word_counts[w] += c
+            postings.append(doc)
+        self.category_distribution.update(paper["categories"])
+
+        self.longest_abs = max(self.longest_abs, stats["total_words"])
+        self.shortest_abs = min(self.shortest_abs, stats["total_words"])
+
+        self.uppercase_terms.update(stats["technical_terms"]["uppercase_terms"])
+        self.numeric_terms.update(stats["technical_terms"]["numeric_terms"])
+        self.hyphenated_terms.update(stats["technical_terms"]["hyphenated_terms"])
+
+    def merge(self, other):
+        """Fold in the aggregate of the papers that came after this one's.
+
+        Merging is associative, and keeps first-seen order and document numbering, so
+        merging per-chunk aggregates in input order gives exactly the serial result.
+        """
+        offset = self.total_abstracts
+        self.total_abstracts += other.total_abstracts
+        self.total_words += other.total_words
+        word_counts, index = self.word_counts, self.postings
+        for w, c in other.word_counts.items():
+            postings = index.get(w)
+            if postings is None:
+                postings = index[w] = array("I")
+                word_counts[w] = c
+            else:
+                word_counts[w] += c
+            postings.extend(doc + offset for doc in other.postings[w])
+        self.category_distribution.update(other.category_distribution)
+
+        self.longest_abs = max(self.longest_abs, other.longest_abs)
+        self.shortest_abs = min(self.shortest_abs, other.shortest_abs)
+
+        self.uppercase_terms |= other.uppercase_terms
+        self.numeric_terms |= other.numeric_terms
+        self.hyphenated_terms |= other.hyphenated_terms
+
+    def document_frequency(self, word):
+        postings = self.postings.get(word)
+        return len(postings) if postings is not None else 0
+
+    def to_analysis(self, query):
+        avg_abstract_length = self.total_words / self.total_abstracts if self.total_abstracts else 0
+        # stopwords are filtered only here; word_counts keeps first-seen order, so ties rank as before
+        freq_global = Counter({w: c for w, c in self.word_counts.items() if w not in STOPWORDS})
+        top_50 = [
+            {"word": w, "frequency": c, "documents": self.document_frequency(w)}
+            for w, c in freq_global.most_common(50)
+        ]
+
+        return {
+            "query": query,
+            "papers_processed": self.total_abstracts,
+            "processing_timestamp": datetime.now(timezone.utc).isoformat(),
+            "stats": {
+                "total_abstracts": self.total_abstracts,
+                "total_words": self.total_words,
+                "unique_words_global": len(self.word_counts),
+                "avg_abstract_length": avg_abstract_length,
+                "longest_abstract_words": self.longest_abs,
+                "shortest_abstract_words": (self.shortest_abs if self.shortest_abs != float("inf") else 0),
+            },
+            "top_50_words": top_50,
+            "technical_terms": {
+                "uppercase_terms": sorted(list(self.uppercase_terms)),
+                "numeric_terms": sorted(list(self.numeric_terms)),
+                "hyphenated_terms": sorted(list(self.hyphenated_terms)),
+            },
+            "category_distribution": dict(self.category_distribution),
         }
-        for w, c in freq_global.most_common(50)
-    ]
-
-    stats = {
-        "query": query,
-        "papers_processed": total_abstracts,
-        "processing_timestamp": datetime.now(timezone.utc).isoformat(),
-        "stats": {
-            "total_abstracts": total_abstracts,
-            "total_words": total_words,
-            "unique_words_global": unique_words_global,
-            "avg_abstract_length": avg_abstract_length,
-            "longest_abstract_words": longest_abs,
-            "shortest_abstract_words": (shortest_abs if shortest_abs != float("inf") else 0),
-        },
-        "top_50_words": top_50,
-        "technical_terms": {
-            "uppercase_terms": sorted(list(uppercase_terms)),
-            "numeric_terms": sorted(list(numeric_terms)),
-            "hyphenated_terms": sorted(list(hyphenated_terms)),
-        },
-        "category_distribution": dict(category_distribution),
-    }
-
-    out_path = os.path.join(output_dir, "analysis.json")
-    with open(out_path, "w", encoding="utf-8") as f:
-        json.dump(stats, f, indent=2, ensure_ascii=False)
 
 
-def write_papers_output(papers, output_dir):
-    # writes papers.json with metadata and abstract stats
-    papers_only = [p for p, _ in papers]
-    out_path = os.path.join(output_dir, "papers.json")
+def aggregate_analysis(query, aggregate, output_dir):
+    # writes the analysis across all papers collected in an AbstractAggregate
+    out_path = os.path.join(output_dir, "analysis.json")
     with open(out_path, "w", encoding="utf-8") as f:
-        json.dump(papers_only, f, indent=2, ensure_ascii=False)
-
+        json.dump(aggregate.to_analysis(query), f, indent=2, ensure_ascii=False)
 
-def main():
-    if len(sys.argv) != 4:
-        sys.exit(1)
 
-    query = sys.argv[1]
+def analyze_chunk(entries):
+    # pool task: analyze a chunk of entries and aggregate them locally
+    papers = []
+    aggregate = AbstractAggregate()
+    for fields in entries:
+        paper, abstract_stats = build_paper(fields)
+        aggregate.add(paper, abstract_stats)
+        papers.append(paper)
+    return papers, aggregate
+
+
+def analyze_entries(entries, workers=1, chunk_size=256):
+    """Yield (papers, partial AbstractAggregate) for each chunk of entries, in input order.
+
+    With workers > 1 the chunks are analyzed by a process pool; at most 2 * workers
+    chunks are in flight, so a long harvest is never buffered in memory.
+    """
+    entries = iter(entries)
+    chunks = iter(lambda: list(islice(entries, chunk_size)), [])
+    if workers <= 1:
+        yield from map(analyze_chunk, chunks)
+        return
+    # forked workers must not inherit unwritten log lines
+    flush_logs()
+    with Pool(workers) as pool:
+        window = deque()
+        for chunk in chunks:
+            window.append(pool.apply_async(analyze_chunk, (chunk,)))
+            if len(window) >= 2 * workers:
+                yield window.popleft().get()
+        while window:
+            yield window.popleft().get()
+
+
+def process_entries(entries, output_dir, workers=1, chunk_size=256, fmt="json"):
+    """Analyze entries, stream them to the papers file and return the merged AbstractAggregate."""
+    aggregate = AbstractAggregate()
+    writer = open_papers_writer(output_dir, fmt)
     try:
-        max_results = int(sys.argv[2])
-        if not (1 <= max_results <= 100):
-            raise ValueError
-    except ValueError:
+        for papers, partial in analyze_entries(entries, workers, chunk_size):
+            for paper in papers:
+                writer.add(paper)
+                log(f"Processing paper: {paper['arxiv_id']}", output_dir)
+            aggregate.merge(partial)
+    finally:
+        writer.close()
+    return aggregate
+
+
+class PapersWriter:
+    """Writes papers.json one page at a time.
+
+    The file is byte-identical to json.dump(papers, indent=2) and is only created once
+    the first paper arrives.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.f = None
+
+    def add(self, paper):
+        if self.f is None:
+            self.f = open(self.path, "w", encoding="utf-8")
+            self.f.write("[\n  ")
+        else:
+            self.f.write(",\n  ")
+        self.f.write(json.dumps(paper, indent=2, ensure_ascii=False).replace("\n", "\n  "))
+
+    def close(self):
+        if self.f is not None:
+            self.f.write("\n]")
+            self.f.close()
+
+
+class JsonLinesPapersWriter:
+    """Writes papers.jsonl: one compact JSON object per line, readable as a stream."""
+
+    def __init__(self, path):
+        self.path = path
+        self.f = None
+
+    def add(self, paper):
+        if self.f is None:
+            self.f = open(self.path, "w", encoding="utf-8")
+        self.f.write(json.dumps(paper, ensure_ascii=False) + "\n")
+
+    def close(self):
+        if self.f is not None:
+            self.f.close()
+
+
+def paper_schema():
+    return pa.schema([
+        ("arxiv_id", pa.string()),
+        ("title", pa.string()),
+        ("authors", pa.list_(pa.string())),
+        ("abstract", pa.string()),
+        ("categories", pa.list_(pa.string())),
+        ("published", pa.string()),
+        ("updated", pa.string()),
+        ("abstract_stats", pa.struct([
+            ("total_words", pa.int64()),
+            ("unique_words", pa.int64()),
+            ("total_sentences", pa.int64()),
+            ("avg_words_per_sentence", pa.float64()),
+            ("avg_word_length", pa.float64()),
+        ])),
+    ])
+
+
+class ArrowPapersWriter:
+    """Writes papers.parquet or papers.arrow (Arrow IPC file) in record batches.
+
+    At most batch_size papers are held in memory; readers can load single columns.
+    """
+
+    def __init__(self, path, fmt, batch_size=1024):
+        self.path = path
+        self.fmt = fmt
+        self.batch_size = batch_size
+        self.schema = paper_schema()
+        self.rows = []
+        self.writer = None
+
+    def add(self, paper):
+        self.rows.append(paper)
+        if len(self.rows) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.rows:
+            return
+        batch = pa.RecordBatch.from_pylist(self.rows, schema=self.schema)
+        self.rows = []
+        if self.writer is None:
+            if self.fmt == "parquet":
+                self.writer = pq.ParquetWriter(self.path, self.schema)
+            else:
+                self.writer = pa.ipc.new_file(self.path, self.schema)
+        if self.fmt == "parquet":
+            self.writer.write_table(pa.Table.from_batches([batch]))
+        else:
+            self.writer.write_batch(batch)
+
+    def close(self):
+        self.flush()
+        if self.writer is not None:
+            self.writer.close()
+
+
+PAPERS_FILES = {"json": "papers.json", "jsonl": "papers.jsonl", "parquet": "papers.parquet", "arrow": "papers.arrow"}
+
+
+def open_papers_writer(output_dir, fmt="json"):
+    path = os.path.join(output_dir, PAPERS_FILES[fmt])
+    if fmt == "json":
+        return PapersWriter(path)
+    if fmt == "jsonl":
+        return JsonLinesPapersWriter(path)
+    return ArrowPapersWriter(path, fmt)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Fetch and analyze arXiv paper metadata")
+    parser.add_argument("query")
+    parser.add_argument("max_results", type=int)
+    parser.add_argument("output_dir")
+    parser.add_argument("--harvest", action="store_true",
+                        help="page through the results; max_results may then exceed 100")
+    parser.add_argument("--page-size", type=int, default=1000,
+                        help="harvest mode: results per request (the API allows up to 2000)")
+    parser.add_argument("--parallel", type=int, default=4, help="harvest mode: requests in flight at once")
+    parser.add_argument("--rate", type=float, default=1 / 3,
+                        help="harvest mode: requests per second (arXiv asks for one every 3 seconds)")
+    parser.add_argument("--burst", type=int, default=1, help="harvest mode: requests allowed back to back")
+    parser.add_argument("--api-url", default=ARXIV_API_URL)
+    parser.add_argument("--cache-dir", default=None,
+                        help="on-disk cache of API responses, reused by later runs (default: no cache)")
+    parser.add_argument("--cache-ttl", type=float, default=24,
+                        help="hours before a cached response is fetched again (default 24)")
+    parser.add_argument("--cache-max-mb", type=float, default=256,
+                        help="cache size bound in MiB, least recently used responses are evicted (default 256)")
+    parser.add_argument("--offline", action="store_true",
+                        help="serve responses only from --cache-dir, ignoring the TTL; fail if one is missing")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="processes analyzing abstracts; output is identical to the serial run")
+    parser.add_argument("--chunk-size", type=int, default=256, help="abstracts handed to a worker at a time")
+    parser.add_argument("--format", choices=sorted(PAPERS_FILES), default="json",
+                        help="papers output: pretty JSON (default), JSON Lines, or Parquet/Arrow IPC (needs pyarrow)")
+    args = parser.parse_args(argv)
+    if args.offline and not args.cache_dir:
+        parser.error("--offline requires --cache-dir")
+    if args.cache_max_mb <= 0:
+        parser.error("--cache-max-mb must be > 0")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.format in ("parquet", "arrow") and pa is None:
+        print(f"Error: --format {args.format} requires pyarrow")
+        sys.exit(1)
+    query = args.query
+    max_results = args.max_results
+    if max_results < 1 or (not args.harvest and max_results > 100):
         print("Error: max_results must be an integer between 1 and 100")
         sys.exit(1)
 
-    output_dir = sys.argv[3]
+    output_dir = args.output_dir
     os.makedirs(output_dir, exist_ok=True)
 
     log(f"Starting ArXiv query: {query}", output_dir)
 
+    cache = None
+    if args.cache_dir:
+        cache = QueryCache(args.cache_dir, int(args.cache_max_mb * 1024 * 1024), args.cache_ttl * 3600, args.offline)
+
     start_time = time.time()
-    xml_data = fetch_arxiv_data(query, max_results, output_dir)
-    papers = parse_arxiv_xml(xml_data, output_dir)
+    if args.harvest:
+        limiter = TokenBucket(args.rate, args.burst)
+        pages = harvest(query, max_results, output_dir, args.page_size, args.parallel, limiter, args.api_url, cache)
+    else:
+        feed = open_arxiv_feed(query, max_results, output_dir, api_url=args.api_url, cache=cache)
+        pages = [iter_arxiv_entries(feed, output_dir)]
+
+    # papers go to the papers file and into the aggregate chunk by chunk as they are analyzed,
+    # so no list of papers is kept
+    aggregate = process_entries(chain.from_iterable(pages), output_dir, args.workers, args.chunk_size, args.format)
+    if not args.harvest:
+        feed.close()
 
     elapsed = time.time() - start_time
-    log(f"Completed processing: {len(papers)} papers in {elapsed:.2f} seconds", output_dir)
+    log(f"Completed processing: {aggregate.total_abstracts} papers in {elapsed:.2f} seconds", output_dir)
+    if cache:
+        cache.close()
+        log(f"Cache stats: {cache.stats()}", output_dir)
 
-    if not papers:
+    if not aggregate.total_abstracts:
         log("No valid papers processed. Exiting.", output_dir)
         sys.exit(0)
 
     # outputs
-    write_papers_output(papers, output_dir)
-    aggregate_analysis(query, papers, output_dir)
+    aggregate_analysis(query, aggregate, output_dir)
 
-    print(f"Generated papers.json and analysis.json in {output_dir}")
+    flush_logs()
+    print(f"Generated {PAPERS_FILES[args.format]} and analysis.json in {output_dir}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,145 @@
+import sys
+import os
+import re
+import json
+import time
+import random
+import tempfile
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+
+import arxiv_processor
+from arxiv_processor import STOPWORDS, AbstractAggregate, analyze_abstract
+
+"""
+Benchmark for the corpus analysis in arxiv_processor.py
+Times the inverted-index aggregation against the previous implementation, which
+re-tokenized every abstract for each of the top 50 words, and checks both agree
+"""
+
+SIZES = [100, 10000, 100000]
+VOCAB = [f"term{i}" for i in range(20000)] + sorted(STOPWORDS) * 20 + ["BERT", "GPT-4", "3D", "state-of-the-art"]
+CATEGORIES = ["cs.LG", "cs.AI", "cs.CL", "cs.CV", "stat.ML", "math.OC"]
+
+
+def make_papers(count, seed=0):
+    # Zipf-like word choice so the top 50 words look like a real corpus
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) for rank in range(len(VOCAB))]
+    papers = []
+    for i in range(count):
+        words = rng.choices(VOCAB, weights, k=rng.randint(60, 250))
+        sentences = [" ".join(words[j:j + 20]) + "." for j in range(0, len(words), 20)]
+        abstract = " ".join(sentences)
+        paper = {"arxiv_id": str(i), "abstract": abstract, "categories": rng.sample(CATEGORIES, rng.randint(1, 3))}
+        papers.append((paper, analyze_abstract(abstract)))
+    return papers
+
+
+def aggregate_analysis_reference(query, papers, output_dir):
+    # the implementation this replaced, kept verbatim for timing and output comparison
+    total_abstracts = len(papers)
+    total_words = sum(p[1]["total_words"] for p in papers)
+    all_words = []
+    category_distribution = defaultdict(int)
+    uppercase_terms, numeric_terms, hyphenated_terms = set(), set(), set()
+
+    longest_abs = 0
+    shortest_abs = float("inf")
+
+    for p, stats in papers:
+        all_words.extend([w.lower() for w in re.findall(r"\b[\w\-]+\b", p["abstract"])])
+        for cat in p["categories"]:
+            category_distribution[cat] += 1
+
+        longest_abs = max(longest_abs, stats["total_words"])
+        shortest_abs = min(shortest_abs, stats["total_words"])
+
+        uppercase_terms.update(stats["technical_terms"]["uppercase_terms"])
+        numeric_terms.update(stats["technical_terms"]["numeric_terms"])
+        hyphenated_terms.update(stats["technical_terms"]["hyphenated_terms"])
+
+    unique_words_global = len(set(all_words))
+    avg_abstract_length = total_words / total_abstracts if total_abstracts else 0
+
+    freq_global = Counter([w for w in all_words if w not in STOPWORDS])
+    top_50 = [
+        {
+            "word": w,
+            "frequency": c,
+            "documents": sum(
+                1 for _, s in papers
+                if w in [x.lower() for x in re.findall(r"\b[\w\-]+\b", _["abstract"])]
+            )
+        }
+        for w, c in freq_global.most_common(50)
+    ]
+
+    stats = {
+        "query": query,
+        "papers_processed": total_abstracts,
+        "processing_timestamp": datetime.now(timezone.utc).isoformat(),
+        "stats": {
+            "total_abstracts": total_abstracts,
+            "total_words": total_words,
+            "unique_words_global": unique_words_global,
+            "avg_abstract_length": avg_abstract_length,
+            "longest_abstract_words": longest_abs,
+            "shortest_abstract_words": (shortest_abs if shortest_abs != float("inf") else 0),
+        },
+        "top_50_words": top_50,
+        "technical_terms": {
+            "uppercase_terms": sorted(list(uppercase_terms)),
+            "numeric_terms": sorted(list(numeric_terms)),
+            "hyphenated_terms": sorted(list(hyphenated_terms)),
+        },
+        "category_distribution": dict(category_distribution),
+    }
+
+    out_path = os.path.join(output_dir, "analysis.json")
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump(stats, f, indent=2, ensure_ascii=False)
+
+
+def run_indexed(papers, out_dir):
+    aggregate = AbstractAggregate()
+    for paper, stats in papers:
+        aggregate.add(paper, stats)
+    arxiv_processor.aggregate_analysis("bench", aggregate, out_dir)
+
+
+def load_analysis(out_dir):
+    with open(os.path.join(out_dir, "analysis.json"), encoding="utf-8") as f:
+        analysis = json.load(f)
+    analysis.pop("processing_timestamp")
+    return analysis
+
+
+def main():
+    # optional cap on the corpus size the slow reference is run at
+    max_reference = int(sys.argv[1]) if len(sys.argv) > 1 else max(SIZES)
+    with tempfile.TemporaryDirectory() as tmp:
+        for count in SIZES:
+            papers = make_papers(count)
+            timings = {}
+            for name, fn in [("indexed", run_indexed), ("reference", aggregate_analysis_reference)]:
+                if name == "reference" and count > max_reference:
+                    continue
+                out_dir = os.path.join(tmp, f"{name}_{count}")
+                os.makedirs(out_dir)
+                start = time.perf_counter()
+                if name == "reference":
+                    fn("bench", papers, out_dir)
+                else:
+                    fn(papers, out_dir)
+                timings[name] = time.perf_counter() - start
+
+            line = f"{count:>7} abstracts  indexed {timings['indexed']:8.3f}s"
+            if "reference" in timings:
+                assert load_analysis(os.path.join(tmp, f"indexed_{count}")) == load_analysis(os.path.join(tmp, f"reference_{count}"))
+                line += f"  reference {timings['reference']:8.3f}s  speedup x{timings['reference'] / timings['indexed']:.0f}"
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
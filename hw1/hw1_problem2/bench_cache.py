@@ -0,0 +1,80 @@
+import os
+import json
+import time
+import tempfile
+
+import arxiv_processor
+from bench_harvest import StubArxivHandler, start_stub
+
+"""
+Local test and benchmark for the response cache in arxiv_processor.py
+Runs the same harvest against the stub arXiv API cold, warm, offline, after the TTL
+and with a small size bound, checking the outputs match and counting API requests
+"""
+
+TOTAL = 2000
+PAGE_SIZE = 200
+RATE = "10"
+
+
+def run(api_url, out_dir, extra_args):
+    StubArxivHandler.requests = 0
+    start = time.time()
+    arxiv_processor.main(["cat:cs.LG", str(TOTAL), out_dir, "--harvest", "--page-size", str(PAGE_SIZE),
+                          "--rate", RATE, "--api-url", api_url] + extra_args)
+    elapsed = time.time() - start
+    arxiv_processor.flush_logs()
+    with open(os.path.join(out_dir, "papers.json"), "rb") as f:
+        papers = f.read()
+    with open(os.path.join(out_dir, "processing.log")) as f:
+        stats = [line.split("Cache stats: ")[1].strip() for line in f if "Cache stats: " in line][-1]
+    return elapsed, papers, StubArxivHandler.requests, stats
+
+
+def main():
+    server = start_stub()
+    api_url = f"http://127.0.0.1:{server.server_address[1]}/api/query"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache_dir = os.path.join(tmp, "cache")
+        cache_args = ["--cache-dir", cache_dir]
+        print(f"{TOTAL} papers in {TOTAL // PAGE_SIZE} pages")
+
+        baseline = None
+        for label, extra_args in [("cold", []), ("warm", []), ("offline", ["--offline"]),
+                                  ("expired", ["--cache-ttl", "0"])]:
+            elapsed, papers, requests, stats = run(api_url, os.path.join(tmp, label), cache_args + extra_args)
+            if baseline is None:
+                baseline = papers
+            # a cached response must give the same papers as a fetched one
+            assert papers == baseline, label
+            print(f"  {label:<8} {elapsed:6.2f}s  api requests={requests:<3} {stats}")
+            if label in ("warm", "offline"):
+                assert requests == 0, requests
+
+        # a bound of about three pages forces least-recently-used eviction
+        page_mb = os.path.getsize(next(os.path.join(cache_dir, n) for n in os.listdir(cache_dir)
+                                       if n.endswith(".xml"))) / (1024 * 1024)
+        bounded_dir = os.path.join(tmp, "bounded_cache")
+        elapsed, papers, requests, stats = run(api_url, os.path.join(tmp, "bounded"),
+                                               ["--cache-dir", bounded_dir, "--cache-max-mb", str(3.5 * page_mb)])
+        assert papers == baseline
+        with open(os.path.join(bounded_dir, "index.json")) as f:
+            assert len(json.load(f)) == 3
+        print(f"  bounded  {elapsed:6.2f}s  api requests={requests:<3} {stats}")
+
+        # offline with pages missing from the cache fails instead of going to the network
+        try:
+            run(api_url, os.path.join(tmp, "offline_miss"), ["--cache-dir", bounded_dir, "--offline"])
+        except SystemExit as e:
+            assert e.code == 1
+            print("  offline run with missing pages exits with status 1")
+        else:
+            raise AssertionError("offline run with missing pages succeeded")
+        assert StubArxivHandler.requests == 0
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
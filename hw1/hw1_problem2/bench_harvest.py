@@ -0,0 +1,164 @@
+import os
+import json
+import time
+import random
+import tempfile
+import threading
+import urllib.parse
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import arxiv_processor
+
+"""
+Local test and benchmark for harvest mode in arxiv_processor.py
+Serves a synthetic Atom feed from a stub arXiv API that answers 429 when requests come
+faster than its rate limit, and times harvests at several parallelism levels
+"""
+
+TOTAL_RESULTS = 4000
+PAGE_SIZE = 200
+RATE = 10.0          # requests per second allowed by the stub and used by the harvester
+LATENCY_S = 1.0      # time the stub takes to answer one page
+STALL_S = 2.0        # pause in the middle of a /stalled/ response
+
+WORDS = ["model", "learning", "neural", "network", "data", "training", "graph", "attention",
+         "transformer", "optimization", "gradient", "sparse", "robust", "inference", "latent",
+         "BERT", "GPT-4", "state-of-the-art", "3D", "large-scale", "the", "of", "and", "a", "we"]
+
+
+def make_entry(i):
+    # one deterministic synthetic <entry>, the same for a given index on every call
+    rng = random.Random(i)
+    sentences = [" ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 20))) + "." for _ in range(rng.randint(3, 8))]
+    authors = "".join(f"<author><name>Author {rng.randint(1, 5000)}</name></author>" for _ in range(rng.randint(1, 4)))
+    categories = "".join(f'<category term="cs.{c}" scheme="http://arxiv.org/schemas/atom"/>'
+                         for c in rng.sample(["LG", "AI", "CL", "CV", "NE", "IR"], rng.randint(1, 3)))
+    return (f"<entry><id>http://arxiv.org/abs/{2301 + i // 100000}.{i % 100000:05d}v1</id>"
+            f"<updated>2023-01-02T00:00:00Z</updated><published>2023-01-01T00:00:00Z</published>"
+            f"<title>Synthetic paper {i}</title><summary>{' '.join(sentences)}</summary>"
+            f"{authors}{categories}</entry>")
+
+
+def make_feed(start, count, total):
+    entries = "".join(make_entry(i) for i in range(start, min(start + count, total)))
+    return ('<?xml version="1.0" encoding="UTF-8"?>'
+            '<feed xmlns="http://www.w3.org/2005/Atom" xmlns:opensearch="http://a9.com/-/spec/opensearch/1.1/">'
+            f"<opensearch:totalResults>{total}</opensearch:totalResults>"
+            f"<opensearch:startIndex>{start}</opensearch:startIndex>"
+            f"{entries}</feed>").encode("utf-8")
+
+
+class StubArxivHandler(BaseHTTPRequestHandler):
+    lock = threading.Lock()
+    last_request = 0.0
+    requests = 0
+    rejected = 0
+
+    def do_GET(self):
+        params = urllib.parse.parse_qs(urllib.parse.urlparse(self.path).query)
+        start = int(params.get("start", ["0"])[0])
+        count = int(params.get("max_results", ["10"])[0])
+        if self.path.startswith("/stalled/"):
+            self.send_stalled(start, count)
+            return
+
+        cls = StubArxivHandler
+        with cls.lock:
+            now = time.monotonic()
+            # small slack for timer jitter between the client and the stub
+            too_fast = now - cls.last_request < 0.5 / RATE
+            cls.last_request = now
+            cls.requests += 1
+            cls.rejected += too_fast
+        if too_fast:
+            self.send_response(429)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        time.sleep(LATENCY_S)
+        body = make_feed(start, count, TOTAL_RESULTS)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/atom+xml")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_stalled(self, start, count):
+        # the first half of the entries, a pause, then the rest of the feed
+        body = make_feed(start, count, TOTAL_RESULTS)
+        split = body.find(b"<entry>", len(body) // 2)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/atom+xml")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body[:split])
+        self.wfile.flush()
+        time.sleep(STALL_S)
+        self.wfile.write(body[split:])
+
+    def log_message(self, fmt, *args):
+        pass
+
+
+def start_stub():
+    # stub server on a free local port, served from a daemon thread
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubArxivHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def check_streaming(port, out_dir):
+    # entries are parsed while the response is still arriving, not after it was read whole
+    api_url = f"http://127.0.0.1:{port}/stalled/query"
+    start = time.time()
+    with arxiv_processor.open_arxiv_feed("cat:cs.LG", 100, out_dir, api_url=api_url) as feed:
+        entries = arxiv_processor.iter_arxiv_entries(feed, out_dir)
+        next(entries)
+        first = time.time() - start
+        rest = sum(1 for _ in entries)
+    assert first < STALL_S and rest == 99, (first, rest)
+    print(f"  first entry after {first:.2f}s of a response stalled for {STALL_S:g}s midway")
+
+
+def main():
+    server = start_stub()
+    api_url = f"http://127.0.0.1:{server.server_address[1]}/api/query"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pages = -(-TOTAL_RESULTS // PAGE_SIZE)
+        print(f"{TOTAL_RESULTS} papers in {pages} pages, {LATENCY_S * 1000:.0f} ms per page, {RATE:g} req/s limit")
+        baseline = None
+        for parallel in [1, 2, 4, 8]:
+            out_dir = os.path.join(tmp, f"out_{parallel}")
+            StubArxivHandler.requests = StubArxivHandler.rejected = 0
+            start = time.time()
+            arxiv_processor.main(["cat:cs.LG", str(TOTAL_RESULTS + 1000), out_dir, "--harvest",
+                                  "--page-size", str(PAGE_SIZE), "--parallel", str(parallel),
+                                  "--rate", str(RATE), "--api-url", api_url])
+            elapsed = time.time() - start
+
+            with open(os.path.join(out_dir, "papers.json"), "rb") as f:
+                raw = f.read()
+            papers = json.loads(raw)
+            # every result exactly once, in API order, and the streamed file matches json.dump
+            assert [p["title"] for p in papers] == [f"Synthetic paper {i}" for i in range(TOTAL_RESULTS)]
+            assert raw == json.dumps(papers, indent=2, ensure_ascii=False).encode("utf-8")
+            with open(os.path.join(out_dir, "analysis.json")) as f:
+                analysis = json.load(f)
+            analysis.pop("processing_timestamp")
+            if baseline is None:
+                baseline = (elapsed, analysis)
+            assert analysis == baseline[1]
+
+            print(f"  parallel={parallel:<3} {elapsed:6.2f}s  speedup x{baseline[0] / elapsed:.1f}"
+                  f"  requests={StubArxivHandler.requests} rejected(429)={StubArxivHandler.rejected}")
+
+        check_streaming(server.server_address[1], tmp)
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
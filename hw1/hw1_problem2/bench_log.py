@@ -0,0 +1,78 @@
+import os
+import time
+import tempfile
+from datetime import datetime, timezone
+
+import arxiv_processor
+from bench_parse import write_feed
+
+"""
+Benchmark for the buffered processing.log writer in arxiv_processor.py
+Measures the cost of one log line, alone and per paper of a full parse/analyze run,
+for the previous open/append/close logger and the buffered one
+"""
+
+NUM_MESSAGES = 50000
+NUM_ENTRIES = 10000
+
+
+def log_reference(message, output_dir, flush=False):
+    # the logger this replaced: one open/append/close per message
+    ts = datetime.now(timezone.utc).isoformat()
+    line = f"[{ts}] {message}\n"
+    log_path = os.path.join(output_dir, "processing.log")
+    with open(log_path, "a", encoding="utf-8") as f:
+        f.write(line)
+
+
+def time_messages(log_fn, out_dir):
+    start = time.perf_counter()
+    for i in range(NUM_MESSAGES):
+        log_fn(f"Processing paper: 2301.{i:05d}v1", out_dir)
+    arxiv_processor.flush_logs()
+    return time.perf_counter() - start
+
+
+def time_pipeline(log_fn, feed_path, out_dir):
+    # the same parse/analyze/write run with the given logger swapped in
+    arxiv_processor.log = log_fn
+    try:
+        start = time.perf_counter()
+        entries = arxiv_processor.iter_arxiv_entries(feed_path, out_dir)
+        arxiv_processor.process_entries(entries, out_dir)
+        arxiv_processor.flush_logs()
+        return time.perf_counter() - start
+    finally:
+        arxiv_processor.log = buffered
+
+
+buffered = arxiv_processor.log
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{NUM_MESSAGES} log lines")
+        for name, fn in [("open/append", log_reference), ("buffered", buffered)]:
+            out_dir = os.path.join(tmp, f"msg_{name.replace('/', '_')}")
+            os.makedirs(out_dir)
+            elapsed = time_messages(fn, out_dir)
+            with open(os.path.join(out_dir, "processing.log")) as f:
+                assert sum(1 for _ in f) == NUM_MESSAGES
+            print(f"  {name:<12} {elapsed:6.3f}s  {elapsed / NUM_MESSAGES * 1e6:6.2f} us/line")
+
+        feed_path = os.path.join(tmp, "feed.xml")
+        write_feed(feed_path, NUM_ENTRIES)
+        print(f"parse + analyze + write, {NUM_ENTRIES} papers")
+        timings = {}
+        for name, fn in [("open/append", log_reference), ("buffered", buffered), ("no logging", lambda *a, **k: None)]:
+            out_dir = os.path.join(tmp, f"run_{name.replace('/', '_').replace(' ', '_')}")
+            os.makedirs(out_dir)
+            timings[name] = time_pipeline(fn, feed_path, out_dir)
+        for name in ["open/append", "buffered"]:
+            overhead = (timings[name] - timings["no logging"]) / NUM_ENTRIES * 1e6
+            print(f"  {name:<12} {timings[name]:6.2f}s  logging overhead {overhead:6.2f} us/paper")
+        print(f"  {'no logging':<12} {timings['no logging']:6.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+import sys
+import os
+import json
+import time
+import tempfile
+import subprocess
+import xml.etree.ElementTree as ET
+
+import arxiv_processor
+from bench_harvest import make_entry
+
+"""
+Peak memory benchmark for the streaming Atom parser in arxiv_processor.py
+Writes synthetic feeds of growing size and compares the old whole-tree parse
+(ET.fromstring, list of papers, one json.dump) with iter_arxiv_xml piped into PapersWriter
+"""
+
+SIZES = [5000, 20000, 50000]
+
+
+def write_feed(path, count):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>'
+                '<feed xmlns="http://www.w3.org/2005/Atom" xmlns:opensearch="http://a9.com/-/spec/opensearch/1.1/">'
+                f"<opensearch:totalResults>{count}</opensearch:totalResults>")
+        for i in range(count):
+            f.write(make_entry(i))
+        f.write("</feed>")
+
+
+def parse_tree(feed_path, out_dir):
+    # the parser this replaces: whole document in memory, then every paper in a list
+    with open(feed_path, "rb") as f:
+        root = ET.fromstring(f.read())
+    papers = []
+    for entry in root.findall("atom:entry", arxiv_processor.ATOM_NS):
+        papers.append(arxiv_processor.build_paper(arxiv_processor.entry_fields(entry)))
+    with open(os.path.join(out_dir, "papers.json"), "w", encoding="utf-8") as f:
+        json.dump([p for p, _ in papers], f, indent=2, ensure_ascii=False)
+    return len(papers)
+
+
+def parse_stream(feed_path, out_dir):
+    writer = arxiv_processor.PapersWriter(os.path.join(out_dir, "papers.json"))
+    count = 0
+    for paper, _ in arxiv_processor.iter_arxiv_xml(feed_path, out_dir):
+        writer.add(paper)
+        count += 1
+    writer.close()
+    return count
+
+
+def child(mode, feed_path, out_dir):
+    start = time.perf_counter()
+    count = {"tree": parse_tree, "stream": parse_stream}[mode](feed_path, out_dir)
+    elapsed = time.perf_counter() - start
+    # VmHWM starts over at exec, unlike ru_maxrss which inherits the parent's high-water mark
+    with open("/proc/self/status") as f:
+        rss = next(int(line.split()[1]) for line in f if line.startswith("VmHWM")) / 1024
+    print(json.dumps({"papers": count, "seconds": elapsed, "peak_rss_mb": rss}))
+
+
+def run_child(mode, feed_path, out_dir):
+    os.makedirs(out_dir)
+    out = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", mode, feed_path, out_dir],
+                         check=True, capture_output=True, text=True).stdout
+    return json.loads(out)
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        for count in SIZES:
+            feed_path = os.path.join(tmp, f"feed_{count}.xml")
+            write_feed(feed_path, count)
+            size_mb = os.path.getsize(feed_path) / 1e6
+            results = {mode: run_child(mode, feed_path, os.path.join(tmp, f"{mode}_{count}")) for mode in ["tree", "stream"]}
+
+            with open(os.path.join(tmp, f"tree_{count}", "papers.json"), "rb") as f:
+                expected = f.read()
+            with open(os.path.join(tmp, f"stream_{count}", "papers.json"), "rb") as f:
+                assert f.read() == expected, "streamed papers.json differs from json.dump"
+            assert results["tree"]["papers"] == results["stream"]["papers"] == count
+
+            print(f"{count:>6} entries ({size_mb:5.1f} MB feed)")
+            for mode, r in results.items():
+                print(f"  {mode:<7} peak rss={r['peak_rss_mb']:7.1f} MiB  {r['seconds']:6.2f}s")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 5 and sys.argv[1] == "--child":
+        child(*sys.argv[2:])
+    else:
+        main()
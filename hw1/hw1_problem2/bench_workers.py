@@ -0,0 +1,67 @@
+import os
+import json
+import time
+import tempfile
+
+import arxiv_processor
+from bench_parse import write_feed
+
+"""
+Checks and times --workers in arxiv_processor.py
+Analyzes a synthetic feed serially (one aggregate, papers added one by one) and through
+the chunked process pool, and requires papers.json and analysis.json to be identical
+"""
+
+NUM_ENTRIES = 20000
+
+
+def run_serial(feed_path, out_dir):
+    # reference: every paper analyzed and added to a single aggregate in order
+    aggregate = arxiv_processor.AbstractAggregate()
+    writer = arxiv_processor.PapersWriter(os.path.join(out_dir, "papers.json"))
+    for paper, abstract_stats in arxiv_processor.iter_arxiv_xml(feed_path, out_dir):
+        writer.add(paper)
+        aggregate.add(paper, abstract_stats)
+    writer.close()
+    return aggregate
+
+
+def run_pool(feed_path, out_dir, workers, chunk_size):
+    entries = arxiv_processor.iter_arxiv_entries(feed_path, out_dir)
+    return arxiv_processor.process_entries(entries, out_dir, workers, chunk_size)
+
+
+def outputs(out_dir, aggregate):
+    arxiv_processor.aggregate_analysis("bench", aggregate, out_dir)
+    with open(os.path.join(out_dir, "analysis.json"), encoding="utf-8") as f:
+        analysis = json.load(f)
+    analysis.pop("processing_timestamp")
+    with open(os.path.join(out_dir, "papers.json"), "rb") as f:
+        return f.read(), analysis
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        feed_path = os.path.join(tmp, "feed.xml")
+        write_feed(feed_path, NUM_ENTRIES)
+        print(f"{NUM_ENTRIES} entries, {os.cpu_count()} cpus")
+
+        out_dir = os.path.join(tmp, "serial")
+        os.makedirs(out_dir)
+        start = time.perf_counter()
+        expected = outputs(out_dir, run_serial(feed_path, out_dir))
+        baseline = time.perf_counter() - start
+        print(f"  serial                {baseline:6.2f}s")
+
+        for workers, chunk_size in [(1, 256), (1, 7), (2, 256), (4, 256), (4, 1000)]:
+            out_dir = os.path.join(tmp, f"pool_{workers}_{chunk_size}")
+            os.makedirs(out_dir)
+            start = time.perf_counter()
+            result = outputs(out_dir, run_pool(feed_path, out_dir, workers, chunk_size))
+            elapsed = time.perf_counter() - start
+            assert result == expected, f"workers={workers} chunk_size={chunk_size} differs from serial"
+            print(f"  workers={workers} chunk={chunk_size:<5} {elapsed:6.2f}s  speedup x{baseline / elapsed:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+import os
+import json
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # optional: only needed for .parquet/.arrow input
+    pa = None
+    pq = None
+
+
+"""
+Reader for the papers files arxiv_processor.py writes
+Shared by hw2 train_embeddings.py and hw3 load_data.py
+"""
+
+
+def load_papers_list(path):
+    # papers.json as arxiv_processor writes it: one JSON array
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def iter_papers(path, columns=None, load_json=load_papers_list):
+    """Yield paper dicts from papers.json, .jsonl, .parquet or .arrow.
+
+    JSON Lines, Parquet and Arrow IPC files are streamed a line or record batch at a
+    time; a .json file is parsed whole by load_json. columns limits the fields returned,
+    and for Parquet/Arrow only those columns are read from disk.
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".jsonl":
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    paper = json.loads(line)
+                    yield {c: paper.get(c) for c in columns} if columns else paper
+    elif ext in (".parquet", ".arrow"):
+        if pa is None:
+            raise RuntimeError(f"reading {ext} files requires pyarrow")
+        if ext == ".parquet":
+            for batch in pq.ParquetFile(path).iter_batches(columns=columns):
+                yield from batch.to_pylist()
+        else:
+            with pa.memory_map(path) as source:
+                reader = pa.ipc.open_file(source)
+                for i in range(reader.num_record_batches):
+                    table = pa.Table.from_batches([reader.get_batch(i)])
+                    yield from (table.select(columns) if columns else table).to_pylist()
+    else:
+        for paper in load_json(path):
+            yield {c: paper.get(c) for c in columns} if columns else paper
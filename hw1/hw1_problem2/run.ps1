@@ -6,15 +6,46 @@
     [int]$MaxResults,
 
     [Parameter(Mandatory = $true)]
-    [string]$OutputDir
+    [string]$OutputDir,
+
+    # page through the results with rate-limited parallel requests (no 100 result cap)
+    [switch]$Harvest,
+
+    # host directory for the API response cache, reused by later runs
+    [string]$CacheDir,
+
+    # answer only from -CacheDir, without calling the API
+    [switch]$Offline
 )
 
 # validating range
-if ($MaxResults -lt 1 -or $MaxResults -gt 100) {
+if ($MaxResults -lt 1 -or (-not $Harvest -and $MaxResults -gt 100)) {
     Write-Error "Error: max_results must be between 1 and 100"
     exit 1
 }
 
+$extraArgs = @()
+if ($Harvest) {
+    $extraArgs += "--harvest"
+}
+if ($Offline -and -not $CacheDir) {
+    Write-Error "Error: -Offline requires -CacheDir"
+    exit 1
+}
+
+$cacheMount = @()
+if ($CacheDir) {
+    if (-not (Test-Path $CacheDir)) {
+        New-Item -ItemType Directory -Path $CacheDir | Out-Null
+    }
+    $absoluteCache = (Resolve-Path $CacheDir).Path
+    $cacheMount = @("-v", "${absoluteCache}:/data/cache")
+    $extraArgs += @("--cache-dir", "/data/cache")
+    if ($Offline) {
+        $extraArgs += "--offline"
+    }
+}
+
 # create dir if does not exists
 if (-not (Test-Path $OutputDir)) {
     New-Item -ItemType Directory -Path $OutputDir | Out-Null
@@ -25,6 +56,6 @@ $absoluteOutput = (Resolve-Path $OutputDir).Path
 
 # run cointainer
 docker run --rm `
-    -v "${absoluteOutput}:/data/output" `
+    -v "${absoluteOutput}:/data/output" @cacheMount `
     arxiv-processor:latest `
-    "$Query" $MaxResults "/data/output"
+    "$Query" $MaxResults "/data/output" @extraArgs
@@ -1,11 +1,33 @@
+import argparse
+import hashlib
+import heapq
 import json
 import os
+import random
 import re
+import sys
 import time
-from collections import Counter
+from collections import Counter, defaultdict
 from datetime import datetime, timezone
 from itertools import combinations
 
+# metrics.py and manifest.py are copied next to this file in the image and live in ../common in the source tree
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common"))
+import metrics
+from manifest import RUN_ID, follow_manifest
+
+try:
+    import numpy as np
+    from scipy import sparse
+except ImportError:  # optional: exact mode falls back to integer-id sets
+    np = None
+    sparse = None
+
+PROCESS_MANIFEST = "/shared/status/processed.jsonl"
+PROCESS_COMPLETE = "/shared/status/process_complete.json"
+FINAL_REPORT = "/shared/analysis/final_report.json"
+ANALYZER_STATE = "/shared/analysis/analyzer_state.json"
+
 def jaccard_similarity(doc1_words, doc2_words):
     set1 = set(doc1_words)
     set2 = set(doc2_words)
@@ -13,55 +35,461 @@ def jaccard_similarity(doc1_words, doc2_words):
     union = set1.union(set2)
     return len(intersection) / len(union) if union else 0.0
 
+def word_id_sets(docs):
+    """Map each word to an integer id once; returns (id set per document, vocabulary size)."""
+    vocab = {}
+    id_sets = [frozenset(vocab.setdefault(w, len(vocab)) for w in words) for words in docs.values()]
+    return id_sets, len(vocab)
+
+def sparse_similarities(names, id_sets, vocab_size, max_chunk_cells):
+    # documents as rows of a binary CSR matrix; X[chunk] @ X.T gives intersection counts in bulk
+    n = len(names)
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    indptr[1:] = np.cumsum([len(s) for s in id_sets])
+    indices = np.fromiter((i for s in id_sets for i in sorted(s)), dtype=np.int64, count=int(indptr[-1]))
+    X = sparse.csr_matrix((np.ones(len(indices), dtype=np.int64), indices, indptr), shape=(n, vocab_size))
+    XT = X.T.tocsr()
+    sizes = np.diff(indptr)
+
+    sims = []
+    chunk = max(1, max_chunk_cells // n)
+    for start in range(0, n - 1, chunk):
+        stop = min(n - 1, start + chunk)
+        inter = (X[start:stop] @ XT).toarray()
+        for i in range(start, stop):
+            row_inter = inter[i - start, i + 1:]
+            union = sizes[i] + sizes[i + 1:] - row_inter
+            # int/int true division in float64 rounds exactly like Python's len()/len()
+            with np.errstate(divide="ignore", invalid="ignore"):
+                row = np.where(union > 0, row_inter / union, 0.0).tolist()
+            for j, similarity in enumerate(row, i + 1):
+                sims.append({"doc1": names[i], "doc2": names[j], "similarity": similarity})
+    return sims
+
+def exact_similarities(docs, max_chunk_cells=1 << 24):
+    """All-pairs Jaccard similarity in combinations() order.
+
+    Word sets are built once per document instead of once per pair. With NumPy/SciPy
+    the intersections come from chunked sparse products (at most max_chunk_cells
+    counts in memory at a time); values are identical to jaccard_similarity.
+    """
+    names = list(docs)
+    id_sets, vocab_size = word_id_sets(docs)
+    if np is not None and len(names) > 1:
+        return sparse_similarities(names, id_sets, vocab_size, max_chunk_cells)
+
+    sizes = [len(s) for s in id_sets]
+    sims = []
+    for i, j in combinations(range(len(names)), 2):
+        inter = len(id_sets[i] & id_sets[j])
+        union = sizes[i] + sizes[j] - inter
+        sims.append({"doc1": names[i], "doc2": names[j], "similarity": inter / union if union else 0.0})
+    return sims
+
+def word_hash(word, cache):
+    h = cache.get(word)
+    if h is None:
+        h = int.from_bytes(hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest(), "big")
+        cache[word] = h
+    return h
+
+PROBE_ORDERS = {}
+
+def probe_orders(num_perm):
+    # fixed pseudo-random donor order for every bin, shared by all signatures
+    if num_perm not in PROBE_ORDERS:
+        orders = []
+        for i in range(num_perm):
+            order = list(range(num_perm))
+            random.Random(i).shuffle(order)
+            orders.append(order)
+        PROBE_ORDERS[num_perm] = orders
+    return PROBE_ORDERS[num_perm]
+
+def minhash_signature(words, num_perm, hash_cache):
+    """One-permutation MinHash signature of a document's word set.
+
+    Each word hashes once into one of num_perm bins and the bin keeps its minimum.
+    An empty bin copies the first non-empty bin in its own fixed random probe order
+    (optimal densification), so two signatures agree in a position with probability
+    close to the Jaccard similarity. Returns None for an empty document.
+    """
+    bins = [None] * num_perm
+    for word in set(words):
+        h = word_hash(word, hash_cache)
+        i = h % num_perm
+        if bins[i] is None or h < bins[i]:
+            bins[i] = h
+    if all(b is None for b in bins):
+        return None
+    signature = list(bins)
+    for i, order in enumerate(probe_orders(num_perm)):
+        if bins[i] is None:
+            signature[i] = next(bins[j] for j in order if bins[j] is not None)
+    return signature
+
+def lsh_candidates(signatures, bands):
+    """Index pairs that share at least one band of their signatures."""
+    candidates = set()
+    for b in range(bands):
+        buckets = defaultdict(list)
+        for idx, sig in enumerate(signatures):
+            if sig is not None:
+                rows = len(sig) // bands
+                buckets[tuple(sig[b * rows:(b + 1) * rows])].append(idx)
+        for members in buckets.values():
+            if len(members) > 1:
+                candidates.update(combinations(members, 2))
+    return candidates
+
+def minhash_similarities(docs, threshold=0.5, num_perm=128, bands=32, recheck=True):
+    """Approximate document_similarity: only LSH candidate pairs at or above threshold.
+
+    With recheck the reported similarity is the exact Jaccard value, otherwise the
+    MinHash estimate. Returns (pairs, number of candidate pairs).
+    """
+    names = list(docs)
+    hash_cache = {}
+    signatures = [minhash_signature(docs[n], num_perm, hash_cache) for n in names]
+    candidates = lsh_candidates(signatures, bands)
+    word_sets = [set(docs[n]) for n in names] if recheck else None
+
+    sims = []
+    for i, j in sorted(candidates):
+        if recheck:
+            union = word_sets[i] | word_sets[j]
+            similarity = len(word_sets[i] & word_sets[j]) / len(union) if union else 0.0
+        else:
+            similarity = sum(a == b for a, b in zip(signatures[i], signatures[j])) / num_perm
+        if similarity >= threshold:
+            sims.append({"doc1": names[i], "doc2": names[j], "similarity": similarity})
+    return sims, len(candidates)
+
+def top_items(counts, k):
+    """The k largest (item, count) pairs, ties broken by item so every run ranks them alike."""
+    return heapq.nsmallest(k, counts.items(), key=lambda kv: (-kv[1], kv[0]))
+
+class SpaceSaving:
+    """Mergeable heavy-hitters summary (Space-Saving style) with bounded memory.
+
+    Holds at most 2 * capacity counters. When full it keeps the capacity largest and the
+    largest dropped count becomes the floor that newly seen items start from, so every
+    count is an upper bound that overestimates by at most floor (0 means exact).
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.counts = {}
+        self.floor = 0
+
+    def update(self, counter):
+        for item, c in counter.items():
+            self.counts[item] = self.counts.get(item, self.floor) + c
+        if len(self.counts) > 2 * self.capacity:
+            self.prune()
+
+    def merge(self, other):
+        if not other.floor:
+            # an exact summary (e.g. a single document) folds in like plain counts
+            self.update(other.counts)
+            return
+        # an item missing from one summary may still have up to that summary's floor there
+        merged = {}
+        for item in self.counts.keys() | other.counts.keys():
+            merged[item] = self.counts.get(item, self.floor) + other.counts.get(item, other.floor)
+        self.counts = merged
+        self.floor += other.floor
+        if len(self.counts) > 2 * self.capacity:
+            self.prune()
+
+    def subtract(self, other):
+        """Remove counts previously added from an exact summary; only possible while exact."""
+        if self.floor or other.floor:
+            raise ValueError("cannot subtract from a pruned summary")
+        for item, c in other.counts.items():
+            remaining = self.counts.get(item, 0) - c
+            if remaining > 0:
+                self.counts[item] = remaining
+            else:
+                self.counts.pop(item, None)
+
+    def prune(self):
+        ranked = sorted(self.counts.items(), key=lambda kv: (-kv[1], kv[0]))
+        self.counts = dict(ranked[:self.capacity])
+        self.floor = max(self.floor, ranked[self.capacity][1])
+
+    def most_common(self, k):
+        return top_items(self.counts, k)
+
+    def to_dict(self):
+        # n-gram words come from str.split(), so a space joins them unambiguously
+        return {"floor": self.floor, "counts": {" ".join(item): c for item, c in self.counts.items()}}
+
+    @classmethod
+    def from_dict(cls, capacity, data):
+        summary = cls(capacity)
+        summary.floor = data["floor"]
+        summary.counts = {tuple(item.split(" ")): c for item, c in data["counts"].items()}
+        return summary
+
+class CorpusStats:
+    """Word, bigram and trigram statistics accumulated one document at a time.
+
+    n-grams never span two documents. Partial stats built by separate workers can be
+    combined with merge().
+    """
+
+    def __init__(self, ngram_capacity=100000):
+        self.documents = 0
+        self.total_words = 0
+        self.total_chars = 0
+        self.sentences = 0
+        self.words = Counter()
+        self.bigrams = SpaceSaving(ngram_capacity)
+        self.trigrams = SpaceSaving(ngram_capacity)
+
+    def add(self, words):
+        self.documents += 1
+        self.total_words += len(words)
+        self.total_chars += sum(len(w) for w in words)
+        self.sentences += len(re.split(r'[.!?]+', " ".join(words)))
+        self.words.update(words)
+        self.bigrams.update(Counter(zip(words, words[1:])))
+        self.trigrams.update(Counter(zip(words, words[1:], words[2:])))
+
+    def merge(self, other):
+        self.documents += other.documents
+        self.total_words += other.total_words
+        self.total_chars += other.total_chars
+        self.sentences += other.sentences
+        self.words.update(other.words)
+        self.bigrams.merge(other.bigrams)
+        self.trigrams.merge(other.trigrams)
+
+    def subtract(self, other):
+        """Undo an earlier merge(other); raises ValueError once the n-gram sketches have pruned."""
+        self.bigrams.subtract(other.bigrams)
+        self.trigrams.subtract(other.trigrams)
+        self.documents -= other.documents
+        self.total_words -= other.total_words
+        self.total_chars -= other.total_chars
+        self.sentences -= other.sentences
+        self.words -= other.words
+
+    def to_dict(self):
+        return {
+            "documents": self.documents,
+            "total_words": self.total_words,
+            "total_chars": self.total_chars,
+            "sentences": self.sentences,
+            "words": dict(self.words),
+            "bigrams": self.bigrams.to_dict(),
+            "trigrams": self.trigrams.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, ngram_capacity, data):
+        stats = cls(ngram_capacity)
+        stats.documents = data["documents"]
+        stats.total_words = data["total_words"]
+        stats.total_chars = data["total_chars"]
+        stats.sentences = data["sentences"]
+        stats.words = Counter(data["words"])
+        stats.bigrams = SpaceSaving.from_dict(ngram_capacity, data["bigrams"])
+        stats.trigrams = SpaceSaving.from_dict(ngram_capacity, data["trigrams"])
+        return stats
+
+def pair_key(a, b):
+    return f"{a}\t{b}" if a < b else f"{b}\t{a}"
+
+def load_state(path, ngram_capacity):
+    """Return the analyzer state of the previous run, or None if it is missing or incompatible.
+
+    The state keeps per-document stats (keyed by source content hash), the corpus totals
+    they add up to and, after an exact run, every pairwise similarity.
+    """
+    try:
+        with open(path) as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if state.get("ngram_capacity") != ngram_capacity:
+        return None
+    return state
+
+def save_state(path, state):
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(state, f)
+    os.replace(tmp, path)
+
+def incremental_similarities(names, docs, rows, changed):
+    """All-pairs Jaccard in combinations() order, recomputing only pairs that touch a changed document.
+
+    rows maps pair_key() to the similarity from the previous run and is updated in place.
+    """
+    word_sets = {n: set(docs[n]) for n in names}
+    for c in changed:
+        for n in names:
+            if n != c:
+                union = word_sets[c] | word_sets[n]
+                rows[pair_key(c, n)] = len(word_sets[c] & word_sets[n]) / len(union) if union else 0.0
+    return [{"doc1": a, "doc2": b, "similarity": rows[pair_key(a, b)]} for a, b in combinations(names, 2)]
+
+def parse_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--similarity", choices=["exact", "minhash"],
+                        default=os.environ.get("ANALYZE_SIMILARITY", "exact"),
+                        help="all-pairs Jaccard or MinHash/LSH candidate pairs (default: exact)")
+    parser.add_argument("--threshold", type=float, default=float(os.environ.get("ANALYZE_THRESHOLD", "0.5")),
+                        help="minhash mode: smallest similarity reported")
+    parser.add_argument("--num-perm", type=int, default=128, help="minhash mode: signature length")
+    parser.add_argument("--bands", type=int, default=32, help="minhash mode: LSH bands, must divide --num-perm")
+    parser.add_argument("--no-recheck", dest="recheck", action="store_false",
+                        help="minhash mode: report the signature estimate instead of exact Jaccard")
+    parser.add_argument("--ngram-capacity", type=int,
+                        default=int(os.environ.get("ANALYZE_NGRAM_CAPACITY", "100000")),
+                        help="bigrams/trigrams tracked exactly before the heavy-hitters sketch prunes")
+    args = parser.parse_args()
+    if args.num_perm % args.bands:
+        parser.error("--bands must divide --num-perm")
+    return args
+
 def main():
+    args = parse_args()
     print(f"[{datetime.now(timezone.utc).isoformat()}] Analyzer starting", flush=True)
     
-    while not os.path.exists("/shared/status/process_complete.json"):
-        print("Waiting for processor to finish...", flush=True)
-        time.sleep(2)
-    
     os.makedirs("/shared/analysis", exist_ok=True)
     os.makedirs("/shared/status", exist_ok=True)
+    stage = metrics.StageMetrics("analyzer")
+    try:
+        os.remove(FINAL_REPORT)  # run_pipeline.ps1 waits for the report of this run
+    except FileNotFoundError:
+        pass
 
+    # documents whose source hash matches the previous run are taken from the saved state;
+    # only changed documents are read and their old contribution swapped for the new one
+    state = load_state(ANALYZER_STATE, args.ngram_capacity)
+    previous = state["documents"] if state else {}
+    if state:
+        stats = CorpusStats.from_dict(args.ngram_capacity, state["corpus"])
+    else:
+        stats = CorpusStats(args.ngram_capacity)
+    rebuild = False
+
+    def retract(doc_state):
+        nonlocal rebuild
+        if not rebuild:
+            try:
+                stats.subtract(CorpusStats.from_dict(args.ngram_capacity, doc_state["stats"]))
+            except ValueError:
+                rebuild = True
+
+    # documents are loaded as the processor announces them; the report is built once it completes
     docs = {}
-    all_words = []
-    for filename in os.listdir("/shared/processed"):
-        if filename.endswith(".json"):
-            with open(os.path.join("/shared/processed", filename)) as f:
-                data = json.load(f)
-                words = data["text"].split()
-                docs[filename] = words
-                all_words.extend(words)
-    
-    counter = Counter(all_words)
-    top_100 = [{"word": w, "count": c, "frequency": c/len(all_words)} for w, c in counter.most_common(100)]
+    doc_stats = {}
+    changed = []
+    for record in follow_manifest(PROCESS_MANIFEST, PROCESS_COMPLETE, on_wait=stage.waited):
+        filename = record["file"]
+        if not filename.endswith(".json"):
+            continue
+        queue_wait = time.time() - record["ts"] if "ts" in record else None
+        start = time.perf_counter()
+        digest = record.get("sha256")
+        old = previous.get(filename)
+        if old is not None and digest is not None and old["sha256"] == digest:
+            doc_stats[filename] = old
+            # similarity only needs each document's word set
+            docs[filename] = list(old["stats"]["words"])
+            stage.record(filename, time.perf_counter() - start, queue_wait=queue_wait, changed=False)
+            continue
+        path = os.path.join("/shared/processed", filename)
+        with open(path) as f:
+            words = json.load(f)["text"].split()
+        doc = CorpusStats(args.ngram_capacity)
+        doc.add(words)
+        if old is not None:
+            retract(old)
+        if not rebuild:
+            stats.merge(doc)
+        docs[filename] = words
+        doc_stats[filename] = {"sha256": digest, "stats": doc.to_dict()}
+        changed.append(filename)
+        stage.record(filename, time.perf_counter() - start, bytes_in=os.path.getsize(path),
+                     queue_wait=queue_wait, changed=True)
+
+    removed = [name for name in previous if name not in doc_stats]
+    for name in removed:
+        retract(previous[name])
+    if rebuild:
+        # a pruned corpus sketch cannot forget counts, so fold the per-document stats again
+        with stage.phase("rebuild"):
+            stats = CorpusStats(args.ngram_capacity)
+            for doc_state in doc_stats.values():
+                stats.merge(CorpusStats.from_dict(args.ngram_capacity, doc_state["stats"]))
     
-    sims = []
-    for (f1, w1), (f2, w2) in combinations(docs.items(), 2):
-        sims.append({"doc1": f1, "doc2": f2, "similarity": jaccard_similarity(w1, w2)})
+    top_100 = [{"word": w, "count": c, "frequency": c/stats.total_words} for w, c in top_items(stats.words, 100)]
     
-    bigrams = Counter(zip(all_words, all_words[1:]))
-    trigrams = Counter(zip(all_words, all_words[1:], all_words[2:]))
+    with stage.phase("similarity"):
+        similarity_method = None
+        if args.similarity == "minhash":
+            sims, candidates = minhash_similarities(docs, args.threshold, args.num_perm, args.bands, args.recheck)
+            similarity_method = {
+                "mode": "minhash",
+                "threshold": args.threshold,
+                "num_perm": args.num_perm,
+                "bands": args.bands,
+                "exact_recheck": args.recheck,
+                "candidate_pairs": candidates,
+            }
+            rows = None
+        elif state and state.get("similarity") is not None:
+            rows = {key: sim for key, sim in state["similarity"].items()
+                    if all(name in docs for name in key.split("\t"))}
+            sims = incremental_similarities(list(docs), docs, rows, changed)
+        else:
+            sims = exact_similarities(docs)
+            rows = {pair_key(s["doc1"], s["doc2"]): s["similarity"] for s in sims}
     
-    sentences = sum(len(re.split(r'[.!?]+', " ".join(w))) for w in docs.values())
-    avg_sentence_length = len(all_words)/sentences if sentences else 0
+    avg_sentence_length = stats.total_words/stats.sentences if stats.sentences else 0
+    avg_word_length = stats.total_chars/stats.total_words if stats.total_words else 0
     
     report = {
+        "run_id": RUN_ID,
         "processing_timestamp": datetime.now(timezone.utc).isoformat(),
         "documents_processed": len(docs),
-        "total_words": len(all_words),
-        "unique_words": len(set(all_words)),
+        "total_words": stats.total_words,
+        "unique_words": len(stats.words),
         "top_100_words": top_100,
         "document_similarity": sims,
-        "top_bigrams": [{"bigram": " ".join(bg), "count": c} for bg, c in bigrams.most_common(20)],
+        "top_bigrams": [{"bigram": " ".join(bg), "count": c} for bg, c in stats.bigrams.most_common(20)],
+        "top_trigrams": [{"trigram": " ".join(tg), "count": c} for tg, c in stats.trigrams.most_common(20)],
+        "ngram_error_bound": {"bigrams": stats.bigrams.floor, "trigrams": stats.trigrams.floor},
         "readability": {
             "avg_sentence_length": avg_sentence_length,
-            "avg_word_length": sum(len(w) for w in all_words)/len(all_words) if all_words else 0,
-            "complexity_score": avg_sentence_length * (sum(len(w) for w in all_words)/len(all_words) if all_words else 0)
+            "avg_word_length": avg_word_length,
+            "complexity_score": avg_sentence_length * avg_word_length
         }
     }
+    if similarity_method:
+        report["similarity_method"] = similarity_method
+    report["incremental"] = {
+        "changed_documents": len(changed),
+        "unchanged_documents": len(docs) - len(changed),
+        "removed_documents": len(removed),
+        "full_rebuild": state is None or rebuild,
+    }
     
-    with open("/shared/analysis/final_report.json", "w") as f:
+    with stage.phase("save_state"):
+        save_state(ANALYZER_STATE, {
+            "ngram_capacity": args.ngram_capacity,
+            "corpus": stats.to_dict(),
+            "documents": doc_stats,
+            "similarity": rows,
+        })
+    # metrics go out first: run_pipeline.ps1 treats final_report.json as the completion signal
+    stage.publish()
+    with open(FINAL_REPORT, "w") as f:
         json.dump(report, f, indent=2)
     
     print(f"[{datetime.now(timezone.utc).isoformat()}] Analyzer complete", flush=True)
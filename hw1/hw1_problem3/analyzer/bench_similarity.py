@@ -0,0 +1,128 @@
+import json
+import random
+import sys
+import time
+from itertools import combinations
+
+import analyze
+
+"""
+Benchmark for MinHash/LSH similarity in analyze.py
+Compares recall and runtime against the exact all-pairs path on synthetic corpora,
+and the set-cache / sparse-matrix exact path against the original pairwise loop
+"""
+
+VOCAB = [f"w{i}" for i in range(20000)]
+DOC_WORDS = 80
+THRESHOLD = 0.5
+
+
+def make_corpus(num_docs, seed=547):
+    # clusters of near-duplicates (random word replacements) among unrelated documents
+    rng = random.Random(seed)
+    docs = {}
+    clusters = []
+    while len(docs) < num_docs:
+        base = [rng.choice(VOCAB) for _ in range(DOC_WORDS)]
+        members = []
+        for _ in range(rng.randint(1, 4)):
+            if len(docs) >= num_docs:
+                break
+            rate = rng.uniform(0.0, 0.5)
+            words = [rng.choice(VOCAB) if rng.random() < rate else w for w in base]
+            name = f"page_{len(docs) + 1}.json"
+            docs[name] = words
+            members.append(name)
+        clusters.append(members)
+    return docs, clusters
+
+
+def true_pairs(docs, clusters):
+    # unrelated documents share ~0.5% of their vocabulary, so pairs above the threshold
+    # can only come from the same cluster (checked against all pairs at 1k)
+    pairs = set()
+    for members in clusters:
+        for d1, d2 in combinations(members, 2):
+            if analyze.jaccard_similarity(docs[d1], docs[d2]) >= THRESHOLD:
+                pairs.add((d1, d2))
+    return pairs
+
+
+def pairwise_similarities(docs):
+    # original exact path: two new sets per pair
+    sims = []
+    for (f1, w1), (f2, w2) in combinations(docs.items(), 2):
+        sims.append({"doc1": f1, "doc2": f2, "similarity": analyze.jaccard_similarity(w1, w2)})
+    return sims
+
+
+def exact_runtime(docs, sample_pairs=500000):
+    # all pairs when affordable, otherwise extrapolated from a random sample of pairs
+    n = len(docs)
+    total = n * (n - 1) // 2
+    if total <= sample_pairs:
+        start = time.perf_counter()
+        sims = pairwise_similarities(docs)
+        return time.perf_counter() - start, False, sims
+    names = list(docs)
+    rng = random.Random(1)
+    sample = [rng.sample(names, 2) for _ in range(sample_pairs)]
+    start = time.perf_counter()
+    for d1, d2 in sample:
+        analyze.jaccard_similarity(docs[d1], docs[d2])
+    return (time.perf_counter() - start) * total / sample_pairs, True, None
+
+
+def bench_exact(sizes=(500, 1000, 2000)):
+    print("exact all-pairs: pairwise sets vs cached id sets vs sparse products")
+    for n in sizes:
+        docs, _ = make_corpus(n)
+        timings = {}
+        results = {}
+
+        start = time.perf_counter()
+        results["pairwise"] = pairwise_similarities(docs)
+        timings["pairwise"] = time.perf_counter() - start
+
+        backend = analyze.np
+        for label, np_module in [("id sets", None), ("sparse", backend)]:
+            if label == "sparse" and backend is None:
+                continue
+            analyze.np = np_module
+            start = time.perf_counter()
+            results[label] = analyze.exact_similarities(docs)
+            timings[label] = time.perf_counter() - start
+        analyze.np = backend
+
+        # bit-identical output, compared through the JSON the report would contain
+        expected = json.dumps(results["pairwise"])
+        assert all(json.dumps(r) == expected for r in results.values())
+        print(f"  n={n:<5} " + "  ".join(f"{label} {t:6.2f}s" for label, t in timings.items()))
+
+
+def main():
+    sizes = [int(a) for a in sys.argv[1:]] or [1000, 10000, 100000]
+    bench_exact()
+    print(f"threshold={THRESHOLD}, num_perm=128, bands=32, {DOC_WORDS} words/doc")
+    for n in sizes:
+        docs, clusters = make_corpus(n)
+        truth = true_pairs(docs, clusters)
+
+        exact_s, estimated, exact_sims = exact_runtime(docs)
+        if exact_sims is not None:
+            assert truth == {(s["doc1"], s["doc2"]) for s in exact_sims if s["similarity"] >= THRESHOLD}
+
+        start = time.perf_counter()
+        sims, candidates = analyze.minhash_similarities(docs, THRESHOLD)
+        minhash_s = time.perf_counter() - start
+
+        found = {(s["doc1"], s["doc2"]) for s in sims}
+        assert found <= truth  # rechecked pairs are exact, so no false positives
+        recall = len(found) / len(truth) if truth else 1.0
+        print(f"  n={n:<7} exact {exact_s:9.1f}s{' (est.)' if estimated else '       '}"
+              f"  minhash {minhash_s:6.1f}s  x{exact_s / minhash_s:<8.0f}"
+              f"  candidates={candidates:<7} pairs={len(truth):<6} recall={recall:.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""JSON Lines handoff between pipeline stages.
+
+Each stage appends one record per finished document to its manifest in /shared/status
+and writes a completion file when it is done; the next stage follows the manifest
+as it grows instead of waiting for the whole batch.
+
+The stages start together and the files outlive the containers on the shared volume,
+so both files carry the run id from PIPELINE_RUN_ID (set by run_pipeline.ps1): the
+manifest in a header line, the completion file as a field. A reader skips files left
+by another run until the upstream stage replaces them. Without PIPELINE_RUN_ID every
+run shares the empty id and a stale file can still be picked up at startup.
+"""
+import json
+import os
+import time
+
+RUN_ID = os.environ.get("PIPELINE_RUN_ID", "")
+
+
+def start_manifest(path, complete_path, run_id=RUN_ID):
+    """Start a stage's output for a new run and return the open manifest.
+
+    Drops the stage's completion file from the previous run, then truncates the
+    manifest and writes its header line.
+    """
+    try:
+        os.remove(complete_path)
+    except FileNotFoundError:
+        pass
+    f = open(path, "w")
+    f.write(json.dumps({"run_id": run_id}) + "\n")
+    f.flush()
+    return f
+
+
+def write_complete(path, status, run_id=RUN_ID):
+    # replaced in one step so a reader never sees a half-written completion file
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(dict(status, run_id=run_id), f, indent=2)
+    os.replace(tmp, path)
+
+
+def is_complete(path, run_id=RUN_ID):
+    try:
+        with open(path) as f:
+            return json.load(f).get("run_id") == run_id
+    except (FileNotFoundError, ValueError):
+        return False
+
+
+def follow_manifest(manifest_path, complete_path, poll_interval=0.2, on_wait=None, run_id=RUN_ID):
+    """Yield records appended to a JSON Lines manifest by the upstream stage.
+
+    Returns once the upstream completion file of this run exists and every record has
+    been read. on_wait(seconds) is called for every poll that found nothing to do.
+    """
+    pos = 0
+    pending = b""
+    while True:
+        # check completion before reading so the last records are never missed
+        done = is_complete(complete_path, run_id)
+        if os.path.exists(manifest_path):
+            with open(manifest_path, "rb") as f:
+                f.seek(pos)
+                data = f.read()
+            *lines, rest = (pending + data).split(b"\n")
+            if pos == 0:
+                # the header names the run; a manifest left by another run is read again
+                # from the start until the upstream stage replaces it
+                if lines and json.loads(lines[0]).get("run_id") == run_id:
+                    lines = lines[1:]
+                else:
+                    lines, rest, data = [], b"", b""
+            pos += len(data)
+            pending = rest
+            for line in lines:
+                if line.strip():
+                    yield json.loads(line)
+        if done:
+            return
+        time.sleep(poll_interval)
+        if on_wait:
+            on_wait(poll_interval)
@@ -0,0 +1,164 @@
+"""Per-stage timing and throughput metrics shared by the pipeline containers.
+
+Every stage keeps a StageMetrics, records one entry per document plus named phases,
+and publishes its section into /shared/status/metrics.json when it finishes. Stages
+run in separate containers, so the file is merged under an exclusive lock. Setting
+PIPELINE_METRICS_PROM also writes the same numbers in Prometheus text format.
+"""
+import fcntl
+import json
+import os
+import time
+from contextlib import contextmanager
+
+METRICS_FILE = os.environ.get("PIPELINE_METRICS_FILE", "/shared/status/metrics.json")
+PROMETHEUS_FILE = os.environ.get("PIPELINE_METRICS_PROM", "")
+STAGE_ORDER = ["fetcher", "processor", "analyzer"]
+
+
+class StageMetrics:
+    def __init__(self, stage, path=METRICS_FILE, prometheus_path=PROMETHEUS_FILE):
+        self.stage = stage
+        self.path = path
+        self.prometheus_path = prometheus_path
+        self.started = time.time()
+        self.finished = None
+        self.queue_wait = 0.0
+        self.documents = []
+        self.phases = {}
+
+    def waited(self, seconds):
+        """Add time spent idle: waiting for upstream input or held back by a rate limit."""
+        self.queue_wait += seconds
+
+    def record(self, name, seconds, bytes_in=0, bytes_out=0, queue_wait=None, **extra):
+        doc = {"name": name, "seconds": seconds, "bytes_in": bytes_in, "bytes_out": bytes_out}
+        if queue_wait is not None:
+            # time from the upstream announcement until this stage picked the document up
+            doc["queue_wait"] = max(0.0, queue_wait)
+        doc.update(extra)
+        self.documents.append(doc)
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - start
+
+    def summary(self):
+        finished = self.finished or time.time()
+        wall = finished - self.started
+        seconds = sorted(d["seconds"] for d in self.documents)
+        waits = [d["queue_wait"] for d in self.documents if "queue_wait" in d]
+        return {
+            "started": self.started,
+            "finished": finished,
+            "wall_seconds": wall,
+            "busy_seconds": sum(seconds) + sum(self.phases.values()),
+            "queue_wait_seconds": self.queue_wait,
+            "documents": len(self.documents),
+            "docs_per_sec": len(self.documents) / wall if wall > 0 else 0.0,
+            "bytes_in": sum(d["bytes_in"] for d in self.documents),
+            "bytes_out": sum(d["bytes_out"] for d in self.documents),
+            "document_seconds": {
+                "p50": percentile(seconds, 0.5),
+                "p95": percentile(seconds, 0.95),
+                "max": seconds[-1] if seconds else 0.0,
+            },
+            "document_queue_wait_seconds": {
+                "mean": sum(waits) / len(waits) if waits else 0.0,
+                "max": max(waits) if waits else 0.0,
+            },
+            "phases": self.phases,
+            "per_document": self.documents,
+        }
+
+    def publish(self):
+        """Merge this stage's summary into the shared metrics file."""
+        self.finished = time.time()
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path + ".lock", "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                with open(self.path) as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                data = {}
+            stages = data.get("stages", {})
+            stages[self.stage] = self.summary()
+            data = {"stages": stages, "critical_path": critical_path(stages)}
+            write_atomic(self.path, json.dumps(data, indent=2))
+            if self.prometheus_path:
+                write_atomic(self.prometheus_path, prometheus_text(stages))
+
+
+def reset(path=METRICS_FILE):
+    """Drop metrics left over from an earlier run; called by the first stage."""
+    for name in (path, PROMETHEUS_FILE):
+        if name and os.path.exists(name):
+            os.remove(name)
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def write_atomic(path, text):
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+def critical_path(stages):
+    """Split end-to-end time into the part each stage added after its upstream finished.
+
+    The stages overlap, so a stage only lengthens the pipeline by the time it keeps
+    running after the previous stage is done. The bottleneck is the stage with the
+    most busy (non-waiting) time.
+    """
+    present = [s for s in STAGE_ORDER if s in stages] + sorted(set(stages) - set(STAGE_ORDER))
+    if not present:
+        return {}
+    start = min(stages[s]["started"] for s in present)
+    path = []
+    previous_end = start
+    for s in present:
+        end = stages[s]["finished"]
+        path.append({"stage": s, "seconds": max(0.0, end - previous_end)})
+        previous_end = max(previous_end, end)
+    return {
+        "total_seconds": previous_end - start,
+        "segments": path,
+        "bottleneck": max(present, key=lambda s: stages[s]["busy_seconds"]),
+    }
+
+
+def prometheus_text(stages):
+    metrics = [
+        ("pipeline_stage_wall_seconds", "gauge", "Seconds from stage start to finish", "wall_seconds"),
+        ("pipeline_stage_busy_seconds", "gauge", "Seconds spent working on documents and phases", "busy_seconds"),
+        ("pipeline_stage_queue_wait_seconds", "gauge", "Seconds spent idle waiting for upstream input or a rate limit", "queue_wait_seconds"),
+        ("pipeline_stage_documents_total", "counter", "Documents handled by the stage", "documents"),
+        ("pipeline_stage_docs_per_second", "gauge", "Documents per wall-clock second", "docs_per_sec"),
+        ("pipeline_stage_bytes_in_total", "counter", "Bytes read by the stage", "bytes_in"),
+        ("pipeline_stage_bytes_out_total", "counter", "Bytes written by the stage", "bytes_out"),
+    ]
+    lines = []
+    for name, kind, help_text, key in metrics:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for stage, summary in stages.items():
+            lines.append(f'{name}{{stage="{stage}"}} {summary[key]}')
+    lines.append("# HELP pipeline_document_seconds Per-document processing time")
+    lines.append("# TYPE pipeline_document_seconds summary")
+    for stage, summary in stages.items():
+        for q, key in (("0.5", "p50"), ("0.95", "p95")):
+            lines.append(f'pipeline_document_seconds{{stage="{stage}",quantile="{q}"}} {summary["document_seconds"][key]}')
+        lines.append(f'pipeline_document_seconds_sum{{stage="{stage}"}} {sum(d["seconds"] for d in summary["per_document"])}')
+        lines.append(f'pipeline_document_seconds_count{{stage="{stage}"}} {summary["documents"]}')
+    return "\n".join(lines) + "\n"
@@ -1,18 +1,51 @@
+import hashlib
 import json
 import os
 import sys
 import time
-import urllib.request
 from datetime import datetime, timezone
 
+# metrics.py, manifest.py and fetch_and_process.py are copied next to this file in the image; in the
+# source tree they live in ../common and in hw1_problem1, whose connection pool, cache and checkpoint are reused
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(HERE, "..", "common"))
+sys.path.append(os.path.join(HERE, "..", "..", "hw1_problem1"))
+import metrics
+from manifest import start_manifest, write_complete
+from fetch_and_process import ConnectionPool, HTTPCache, read_checkpoint, replay_checkpoint
+
+# keep-alive pool settings, overridable from docker-compose
+POOL_SIZE = int(os.environ.get("FETCH_POOL_SIZE", "4"))
+POOL_IDLE_TIMEOUT = float(os.environ.get("FETCH_POOL_IDLE_TIMEOUT", "30"))
+
+# append-only journal of finished urls; --resume (or FETCH_RESUME=1) replays it instead of refetching
+CHECKPOINT_FILE = "/shared/status/fetch_checkpoint.jsonl"
+RESUME = "--resume" in sys.argv[1:] or os.environ.get("FETCH_RESUME") == "1"
+
+# per-document handoff: one line per fetched page, followed by the processor as it grows
+MANIFEST_FILE = "/shared/status/fetched.jsonl"
+COMPLETE_FILE = "/shared/status/fetch_complete.json"
+
+# conditional GET cache, disabled when FETCH_CACHE_DIR is empty
+CACHE_DIR = os.environ.get("FETCH_CACHE_DIR", "")
+CACHE_MAX_BYTES = int(float(os.environ.get("FETCH_CACHE_MAX_MB", "256")) * 1024 * 1024)
+
+
 def main():
     print(f"[{datetime.now(timezone.utc).isoformat()}] Fetcher starting", flush=True)
+    metrics.reset()
+    stage = metrics.StageMetrics("fetcher")
+
+    # replace this stage's handoff files first; the processor skips files of other runs
+    os.makedirs("/shared/status", exist_ok=True)
+    manifest = start_manifest(MANIFEST_FILE, COMPLETE_FILE)
     
     # Wait for input file
     input_file = "/shared/input/test_urls.txt"
     while not os.path.exists(input_file):
         print(f"Waiting for {input_file}...", flush=True)
         time.sleep(2)
+        stage.waited(2)
     
     # Read URLs
     with open(input_file, 'r') as f:
@@ -20,24 +53,64 @@ def main():
     
     # Create output directory
     os.makedirs("/shared/raw", exist_ok=True)
-    os.makedirs("/shared/status", exist_ok=True)
     
-    # Fetch each URL
+    # Skip urls finished by a previous run
     results = []
-    for i, url in enumerate(urls, 1):
+    if RESUME and os.path.exists(CHECKPOINT_FILE):
+        resumed, valid_bytes = read_checkpoint(CHECKPOINT_FILE)
+        with open(CHECKPOINT_FILE, "r+b") as f:
+            f.truncate(valid_bytes)
+        results = list(replay_checkpoint(CHECKPOINT_FILE, iter(urls)))
+        print(f"Resuming after {len(results)} completed URLs", flush=True)
+    resumed = len(results)
+    journal = open(CHECKPOINT_FILE, "a" if resumed else "w")
+
+    # Announce pages as soon as they are on disk so the processor can start right away
+    for r in results:
+        if r["status"] == "success":
+            manifest.write(json.dumps({"url": r["url"], "file": r["file"], "sha256": r.get("sha256"), "ts": time.time()}) + "\n")
+    manifest.flush()
+
+    # Fetch each URL
+    pool = ConnectionPool(POOL_SIZE, POOL_IDLE_TIMEOUT)
+    cache = HTTPCache(CACHE_DIR, CACHE_MAX_BYTES) if CACHE_DIR else None
+    for i, url in enumerate(urls[resumed:], resumed + 1):
         output_file = f"/shared/raw/page_{i}.html"
+        start = time.perf_counter()
         try:
             print(f"Fetching {url}...", flush=True)
-            with urllib.request.urlopen(url, timeout=10) as response:
-                content = response.read()
-                with open(output_file, 'wb') as f:
-                    f.write(content)
+            if cache:
+                # on a 304 body reads the cached copy instead
+                response, body, _ = cache.open(pool, url)
+            else:
+                response = body = pool.urlopen(url)
+            with response:
+                try:
+                    # content hash lets later stages skip pages that did not change
+                    digest = hashlib.sha256()
+                    with open(output_file, 'wb') as f:
+                        for chunk in iter(lambda: body.read(64 * 1024), b""):
+                            digest.update(chunk)
+                            f.write(chunk)
+                        size = f.tell()
+                finally:
+                    if body is not response:
+                        body.close()
             results.append({
                 "url": url,
                 "file": f"page_{i}.html",
-                "size": len(content),
+                "size": size,
+                "sha256": digest.hexdigest(),
                 "status": "success"
             })
+            manifest.write(json.dumps({
+                "url": url,
+                "file": f"page_{i}.html",
+                "sha256": digest.hexdigest(),
+                "ts": time.time()
+            }) + "\n")
+            manifest.flush()
+            stage.record(f"page_{i}.html", time.perf_counter() - start, size, size, url=url, status="success")
         except Exception as e:
             results.append({
                 "url": url,
@@ -45,7 +118,16 @@ def main():
                 "error": str(e),
                 "status": "failed"
             })
+            stage.record(url, time.perf_counter() - start, url=url, status="failed")
+        journal.write(json.dumps(results[-1]) + "\n")
+        journal.flush()
         time.sleep(1)  # Rate limiting
+        stage.waited(1)  # idle, not busy, so the sleep never makes the fetcher the bottleneck
+    pool.close()
+    journal.close()
+    manifest.close()
+    if cache:
+        cache.close()
     
     # Write completion status
     status = {
@@ -53,11 +135,14 @@ def main():
         "urls_processed": len(urls),
         "successful": sum(1 for r in results if r["status"] == "success"),
         "failed": sum(1 for r in results if r["status"] == "failed"),
+        "connection_pool": pool.stats(),
+        "resumed": resumed,
+        "http_cache": cache.stats() if cache else None,
         "results": results
     }
     
-    with open("/shared/status/fetch_complete.json", 'w') as f:
-        json.dump(status, f, indent=2)
+    stage.publish()
+    write_complete(COMPLETE_FILE, status)
     
     print(f"[{datetime.now(timezone.utc).isoformat()}] Fetcher complete", flush=True)
 
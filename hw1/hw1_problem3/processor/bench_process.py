@@ -0,0 +1,86 @@
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+import process
+
+"""
+Benchmark for process.py worker pool
+Generates a synthetic corpus of HTML pages and times process_files() at several worker counts
+"""
+
+NUM_PAGES = 3000
+WORDS = ["cloud", "container", "docker", "pipeline", "latency", "throughput", "storage",
+         "network", "compute", "scaling", "the", "a", "of", "and", "to", "in"]
+
+
+def make_page(rng, paragraphs=60):
+    parts = ["<html><head><title>Synthetic page</title>",
+             "<style>body { font-family: sans-serif; } .x { color: red; }</style>",
+             "<script>var data = {a: 1, b: [1, 2, 3]}; function f() { return '<b>x</b>'; }</script>",
+             "</head><body>"]
+    for i in range(paragraphs):
+        sentence = " ".join(rng.choice(WORDS) for _ in range(rng.randint(10, 40)))
+        parts.append(f'<p class="p{i}">{sentence}. <a href="https://example.com/{i}">link {i}</a></p>')
+        if i % 10 == 0:
+            parts.append(f'<img src="/img/{i}.png" alt="figure {i}">')
+    parts.append("</body></html>")
+    return "\n".join(parts)
+
+
+def make_corpus(raw_dir, num_pages):
+    rng = random.Random(547)
+    filenames = []
+    for i in range(1, num_pages + 1):
+        filename = f"page_{i}.html"
+        with open(os.path.join(raw_dir, filename), "w", encoding="utf-8") as f:
+            f.write(make_page(rng))
+        filenames.append(filename)
+    return filenames
+
+
+def load_outputs(out_dir, filenames):
+    # processed_at differs per run, everything else must match the serial output
+    outputs = []
+    for filename in filenames:
+        with open(os.path.join(out_dir, filename.replace(".html", ".json"))) as f:
+            data = json.load(f)
+        data.pop("processed_at")
+        outputs.append(data)
+    return outputs
+
+
+def main():
+    num_pages = int(sys.argv[1]) if len(sys.argv) > 1 else NUM_PAGES
+    worker_counts = [1, 2, 4, os.cpu_count() or 1]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        raw_dir = os.path.join(tmp, "raw")
+        os.makedirs(raw_dir)
+        filenames = make_corpus(raw_dir, num_pages)
+        size_mb = sum(os.path.getsize(os.path.join(raw_dir, n)) for n in filenames) / 1e6
+        print(f"{num_pages} pages, {size_mb:.1f} MB, {os.cpu_count()} cpus")
+
+        baseline = None
+        for workers in sorted(set(worker_counts)):
+            out_dir = os.path.join(tmp, f"out_{workers}")
+            os.makedirs(out_dir)
+            start = time.perf_counter()
+            tasks = [(name, False) for name in filenames]
+            paths = list(process.process_files(tasks, workers, raw_dir, out_dir, chunksize=16))
+            elapsed = time.perf_counter() - start
+
+            assert len(paths) == num_pages
+            outputs = load_outputs(out_dir, filenames)
+            if baseline is None:
+                baseline = (elapsed, outputs)
+            assert outputs == baseline[1], "worker output differs from serial output"
+            print(f"  workers={workers:<3} {elapsed:6.2f}s  {num_pages / elapsed:8.1f} pages/s"
+                  f"  speedup x{baseline[0] / elapsed:.1f}")
+
+
+if __name__ == "__main__":
+    main()
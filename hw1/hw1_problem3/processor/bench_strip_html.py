@@ -0,0 +1,127 @@
+import random
+import re
+import time
+
+import process
+from bench_process import make_page
+
+"""
+Benchmark for the streaming HTML tokenizer in process.py
+Checks it against the previous regex strip_html and compares speed on large documents
+"""
+
+# example.com as fetched by the pipeline (output/final_report.json was built from it)
+SAMPLE_PAGE = """<!doctype html>
+<html>
+<head>
+    <title>Example Domain</title>
+
+    <meta charset="utf-8" />
+    <meta http-equiv="Content-type" content="text/html; charset=utf-8" />
+    <meta name="viewport" content="width=device-width, initial-scale=1" />
+    <style type="text/css">
+    body {
+        background-color: #f0f0f2;
+        margin: 0;
+        padding: 0;
+        font-family: -apple-system, system-ui, BlinkMacSystemFont, "Segoe UI", "Open Sans", "Helvetica Neue", Helvetica, Arial, sans-serif;
+    }
+    div {
+        width: 600px;
+        margin: 5em auto;
+        padding: 2em;
+    }
+    </style>
+</head>
+
+<body>
+<div>
+    <h1>Example Domain</h1>
+    <p>This domain is for use in illustrative examples in documents. You may use this
+    domain in literature without prior coordination or asking for permission.</p>
+    <p><a href="https://www.iana.org/domains/example">More information...</a></p>
+</div>
+</body>
+</html>
+"""
+
+
+MALFORMED_PAGES = [
+    "<p>before</p><script>var x = 1; <a href='/in-script'>kept</a>",
+    "<p>before</p><STYLE type=text/css>p { color: red }<p>after style",
+    "<script src=/a.js></script>text <script>never closed <style>x</style> tail",
+    "<style>a</style>see href=/plain-text and src='/img.png' <b>bold",
+    "a < b and c <d",
+    "<scr<script>ipt>x</script>y href=\"/q\"<i>z</i>",
+]
+MALFORMED_TOKENS = ["<script>", "<script src='/s.js'>", "</script>", "<style>", "</STYLE>", "<", ">", "<>",
+                    "href=", "HREF=\"/h\"", "src='/i.png'", "<a href=/x>", "<p>", "</p>", "word", "mid", " ", "\n"]
+
+
+def make_malformed_page(rng):
+    return "".join(rng.choice(MALFORMED_TOKENS) for _ in range(rng.randint(1, 40)))
+
+
+def strip_html_regex(html_content):
+    # previous implementation, kept here as the reference
+    html_content = re.sub(r'<script[^>]*>.*?</script>', '', html_content, flags=re.DOTALL | re.IGNORECASE)
+    html_content = re.sub(r'<style[^>]*>.*?</style>', '', html_content, flags=re.DOTALL | re.IGNORECASE)
+
+    links = re.findall(r'href=[\'"]?([^\'" >]+)', html_content, flags=re.IGNORECASE)
+    images = re.findall(r'src=[\'"]?([^\'" >]+)', html_content, flags=re.IGNORECASE)
+
+    text = re.sub(r'<[^>]+>', ' ', html_content)
+    text = re.sub(r'\s+', ' ', text).strip()
+
+    return text, links, images
+
+
+def stream(doc, chunk_chars=process.CHUNK_CHARS):
+    extractor = process.HTMLTextExtractor()
+    for i in range(0, len(doc), chunk_chars):
+        extractor.feed(doc[i:i + chunk_chars])
+    return extractor.close()
+
+
+def timed(fn, doc, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(doc)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    # same output as the regex version, including when chunks split tags and words
+    text, links, _ = stream(SAMPLE_PAGE, 7)
+    assert (text, links) == strip_html_regex(SAMPLE_PAGE)[:2]
+    assert len(text.split()) == 30, text  # total_words in output/final_report.json
+    rng = random.Random(547)
+    for _ in range(50):
+        page = make_page(rng)
+        assert stream(page, rng.randint(1, 4096)) == strip_html_regex(page)
+    # malformed input: unterminated script/style, stray '<', href/src outside tags
+    for page in MALFORMED_PAGES:
+        for chunk_chars in [1, 3, 7, 64]:
+            assert stream(page, chunk_chars) == strip_html_regex(page), page
+    for _ in range(500):
+        page = make_malformed_page(rng)
+        assert stream(page, rng.randint(1, 64)) == strip_html_regex(page), page
+    print("output matches regex strip_html")
+
+    docs = {
+        "1 MB page": "\n".join(make_page(rng) for _ in range(75)),
+        "20 MB page": "\n".join(make_page(rng) for _ in range(1500)),
+        # unterminated scripts make the DOTALL .*? pattern rescan to the end of the document
+        "malformed 100 KB": "<script>var x = 1;<p>text</p>" * 3500,
+    }
+    for label, doc in docs.items():
+        regex_s = timed(strip_html_regex, doc)
+        stream_s = timed(stream, doc)
+        print(f"  {label:<15} {len(doc) / 1e6:6.1f} MB  regex {regex_s:7.3f}s  streaming {stream_s:7.3f}s"
+              f"  x{regex_s / stream_s:.1f}")
+
+
+if __name__ == "__main__":
+    main()
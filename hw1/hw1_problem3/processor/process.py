@@ -1,70 +1,333 @@
+import argparse
 import json
 import os
 import re
+import sys
 import time
 from datetime import datetime, timezone
+from functools import partial
+from multiprocessing import Pool
+
+# metrics.py and manifest.py are copied next to this file in the image and live in ../common in the source tree
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "common"))
+import metrics
+from manifest import follow_manifest, start_manifest, write_complete
+
+RAW_DIR = "/shared/raw"
+PROCESSED_DIR = "/shared/processed"
+FETCH_MANIFEST = "/shared/status/fetched.jsonl"
+FETCH_COMPLETE = "/shared/status/fetch_complete.json"
+PROCESS_MANIFEST = "/shared/status/processed.jsonl"
+PROCESS_COMPLETE = "/shared/status/process_complete.json"
+PROCESS_STATE = "/shared/status/process_state.json"
+
+LINK_RE = re.compile(r'href=[\'"]?([^\'" >]+)', re.IGNORECASE)
+IMAGE_RE = re.compile(r'src=[\'"]?([^\'" >]+)', re.IGNORECASE)
+# case-sensitive twins for lowercased ASCII text, where the literal prefix search is much faster
+LINK_LOWER_RE = re.compile(LINK_RE.pattern)
+IMAGE_LOWER_RE = re.compile(IMAGE_RE.pattern)
+CHUNK_CHARS = 64 * 1024
+MAX_TAG_CHARS = 64 * 1024
+
+class ElementFilter:
+    """Streaming re.sub(r'<name[^>]*>.*?</name>', '', html, flags=re.DOTALL | re.IGNORECASE).
+
+    feed() returns the text known to lie outside a removed element. An element is held
+    back until its closing tag arrives; one that never closes is returned unchanged by
+    close(), as the regex leaves it in place.
+    """
+
+    def __init__(self, name):
+        self.start_re = re.compile("<" + name, re.IGNORECASE)
+        self.end_re = re.compile("</" + name + ">", re.IGNORECASE)
+        self.tail = len(name) + 2  # enough to finish either tag in the next chunk
+        self.state = "out"  # out | open | body
+        self.held = []
+        self.carry = ""
+
+    def feed(self, chunk):
+        data = self.carry + chunk
+        self.carry = ""
+        out = []
+        pos = 0
+        while pos < len(data):
+            if self.state == "out":
+                m = self.start_re.search(data, pos)
+                if not m:
+                    split = max(pos, len(data) - self.tail)
+                    out.append(data[pos:split])
+                    self.carry = data[split:]
+                    break
+                out.append(data[pos:m.start()])
+                self.held = [m.group()]
+                self.state = "open"
+                pos = m.end()
+            elif self.state == "open":
+                gt = data.find(">", pos)
+                if gt == -1:
+                    self.held.append(data[pos:])
+                    break
+                self.held.append(data[pos:gt + 1])
+                self.state = "body"
+                pos = gt + 1
+            else:
+                m = self.end_re.search(data, pos)
+                if not m:
+                    split = max(pos, len(data) - self.tail)
+                    self.held.append(data[pos:split])
+                    self.carry = data[split:]
+                    break
+                self.held = []
+                self.state = "out"
+                pos = m.end()
+        return "".join(out)
+
+    def close(self):
+        rest = "".join(self.held) + self.carry
+        self.held = []
+        self.carry = ""
+        self.state = "out"
+        return rest
+
+class HTMLTextExtractor:
+    """Single-pass tokenizer that pulls text, links and images out of streamed HTML.
+
+    Follows the same rules as the old regex passes: script then style elements are
+    dropped (an unterminated one is kept), href/src values are matched over everything
+    left, text included, every tag becomes a space and whitespace is collapsed. Only a
+    partial tag, the tail of the href/src scan and a still open script/style element
+    are carried between chunks.
+    """
+
+    def __init__(self):
+        self.words = []
+        self.glue = False  # last text chunk ended mid-word
+        self.links = []
+        self.images = []
+        self.scripts = ElementFilter("script")
+        self.styles = ElementFilter("style")
+        self.state = "text"  # text | tag | skip
+        self.carry = ""
+        self.scan = ""
+
+    def _text(self, segment):
+        if not segment:
+            return
+        words = segment.split()
+        if words and self.glue and not segment[0].isspace():
+            self.words[-1] += words.pop(0)
+        self.words.extend(words)
+        self.glue = not segment[-1].isspace()
+
+    def _scan(self, chunk, final=False):
+        # href/src matches never contain a space, so everything up to the last one can be scanned
+        data = self.scan + chunk
+        cut = len(data) if final else data.rfind(" ") + 1
+        if len(data) - cut > MAX_TAG_CHARS:
+            cut = len(data)
+        if cut and data.isascii():
+            low = data.lower()
+            self.links.extend(data[m.start(1):m.end(1)] for m in LINK_LOWER_RE.finditer(low, 0, cut))
+            self.images.extend(data[m.start(1):m.end(1)] for m in IMAGE_LOWER_RE.finditer(low, 0, cut))
+        elif cut:
+            self.links.extend(LINK_RE.findall(data, 0, cut))
+            self.images.extend(IMAGE_RE.findall(data, 0, cut))
+        self.scan = data[cut:]
+
+    def feed(self, chunk):
+        data = self.styles.feed(self.scripts.feed(chunk))
+        self._scan(data)
+        self._tokenize(data)
+
+    def _tokenize(self, chunk):
+        data = self.carry + chunk
+        self.carry = ""
+        pos = 0
+        while pos < len(data):
+            if self.state == "text":
+                lt = data.find("<", pos)
+                if lt == -1:
+                    self._text(data[pos:])
+                    return
+                self._text(data[pos:lt])
+                self.state = "tag"
+                pos = lt
+            elif self.state == "tag":
+                gt = data.find(">", pos + 1)
+                if gt == -1:
+                    if len(data) - pos > MAX_TAG_CHARS:
+                        # oversized tag: drop it up to its closing '>'
+                        self.glue = False
+                        self.state = "skip"
+                        return
+                    self.carry = data[pos:]
+                    return
+                if gt == pos + 1:
+                    # "<>" is not a tag
+                    self._text("<>")
+                else:
+                    self.glue = False
+                pos = gt + 1
+                self.state = "text"
+            else:
+                gt = data.find(">", pos)
+                if gt == -1:
+                    return
+                self.state = "text"
+                pos = gt + 1
+
+    def close(self):
+        data = self.styles.feed(self.scripts.close())
+        data += self.styles.close()
+        self._scan(data, final=True)
+        self._tokenize(data)
+        if self.state == "tag":
+            # a '<' that never closes is plain text
+            self._text(self.carry)
+        self.carry = ""
+        return " ".join(self.words), self.links, self.images
 
 def strip_html(html_content):
     """Remove HTML tags and extract text."""
-    html_content = re.sub(r'<script[^>]*>.*?</script>', '', html_content, flags=re.DOTALL | re.IGNORECASE)
-    html_content = re.sub(r'<style[^>]*>.*?</style>', '', html_content, flags=re.DOTALL | re.IGNORECASE)
+    extractor = HTMLTextExtractor()
+    extractor.feed(html_content)
+    return extractor.close()
+
+def process_file(filename, raw_dir=RAW_DIR, out_dir=PROCESSED_DIR):
+    path = os.path.join(raw_dir, filename)
+    extractor = HTMLTextExtractor()
+    with open(path, 'r', encoding="utf-8", errors="ignore") as f:
+        for chunk in iter(lambda: f.read(CHUNK_CHARS), ""):
+            extractor.feed(chunk)
+    text, links, images = extractor.close()
     
-    links = re.findall(r'href=[\'"]?([^\'" >]+)', html_content, flags=re.IGNORECASE)
-    images = re.findall(r'src=[\'"]?([^\'" >]+)', html_content, flags=re.IGNORECASE)
+    words = text.split()
+    sentences = re.split(r'[.!?]+', text)
+    paragraphs = text.split("\n\n")
     
-    text = re.sub(r'<[^>]+>', ' ', html_content)
-    text = re.sub(r'\s+', ' ', text).strip()
+    data = {
+        "source_file": filename,
+        "text": text,
+        "statistics": {
+            "word_count": len(words),
+            "sentence_count": len([s for s in sentences if s.strip()]),
+            "paragraph_count": len([p for p in paragraphs if p.strip()]),
+            "avg_word_length": sum(len(w) for w in words)/len(words) if words else 0
+        },
+        "links": links,
+        "images": images,
+        "processed_at": datetime.now(timezone.utc).isoformat()
+    }
     
-    return text, links, images
+    out_path = os.path.join(out_dir, filename.replace(".html", ".json"))
+    with open(out_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2)
+    return out_path
+
+def process_task(task, raw_dir=RAW_DIR, out_dir=PROCESSED_DIR):
+    """Run one (filename, reuse) task; reused pages keep the output of an earlier run.
+
+    Returns (output path, processed, seconds spent).
+    """
+    filename, reuse = task
+    if reuse:
+        return os.path.join(out_dir, filename.replace(".html", ".json")), False, 0.0
+    start = time.perf_counter()
+    out_path = process_file(filename, raw_dir, out_dir)
+    return out_path, True, time.perf_counter() - start
+
+def process_files(tasks, workers=1, raw_dir=RAW_DIR, out_dir=PROCESSED_DIR, chunksize=1):
+    """Yield (output path, processed, seconds) in input order, sharding the work over `workers` processes."""
+    work = partial(process_task, raw_dir=raw_dir, out_dir=out_dir)
+    if workers <= 1:
+        yield from map(work, tasks)
+        return
+    with Pool(workers) as pool:
+        # imap pulls tasks lazily, so it keeps up with a manifest that is still growing
+        yield from pool.imap(work, tasks, chunksize)
+
+def load_state(path=PROCESS_STATE):
+    """Return {raw filename: sha256} for pages processed by an earlier run."""
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_state(state, path=PROCESS_STATE):
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(state, f)
+    os.replace(tmp, path)
 
 def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("PROCESS_WORKERS", "1")),
+                        help="worker processes (default: $PROCESS_WORKERS or 1)")
+    args = parser.parse_args()
+
     print(f"[{datetime.now(timezone.utc).isoformat()}] Processor starting", flush=True)
-    
-    while not os.path.exists("/shared/status/fetch_complete.json"):
-        print("Waiting for fetcher to finish...", flush=True)
-        time.sleep(2)
 
-    os.makedirs("/shared/processed", exist_ok=True)
+    os.makedirs(PROCESSED_DIR, exist_ok=True)
     os.makedirs("/shared/status", exist_ok=True)
     
+    stage = metrics.StageMetrics("processor")
+    previous = load_state()
+    state = {}
+    hashes = {}
+    waits = {}
+
+    def tasks():
+        # pages are processed as the fetcher announces them instead of after it finishes;
+        # a page whose content hash matches the last run keeps its existing output
+        for record in follow_manifest(FETCH_MANIFEST, FETCH_COMPLETE, on_wait=stage.waited):
+            filename = record["file"]
+            if not filename.endswith(".html"):
+                continue
+            if "ts" in record:
+                waits[filename] = time.time() - record["ts"]
+            digest = record.get("sha256")
+            hashes[filename] = digest
+            out_path = os.path.join(PROCESSED_DIR, filename.replace(".html", ".json"))
+            reuse = digest is not None and previous.get(filename) == digest and os.path.exists(out_path)
+            yield filename, reuse
+
     results = []
-    for filename in os.listdir("/shared/raw"):
-        if filename.endswith(".html"):
-            path = os.path.join("/shared/raw", filename)
-            with open(path, 'r', encoding="utf-8", errors="ignore") as f:
-                html = f.read()
-            text, links, images = strip_html(html)
-            
-            words = text.split()
-            sentences = re.split(r'[.!?]+', text)
-            paragraphs = text.split("\n\n")
-            
-            data = {
-                "source_file": filename,
-                "text": text,
-                "statistics": {
-                    "word_count": len(words),
-                    "sentence_count": len([s for s in sentences if s.strip()]),
-                    "paragraph_count": len([p for p in paragraphs if p.strip()]),
-                    "avg_word_length": sum(len(w) for w in words)/len(words) if words else 0
-                },
-                "links": links,
-                "images": images,
-                "processed_at": datetime.now(timezone.utc).isoformat()
-            }
-            
-            out_path = os.path.join("/shared/processed", filename.replace(".html", ".json"))
-            with open(out_path, "w", encoding="utf-8") as f:
-                json.dump(data, f, indent=2)
+    reused = 0
+    with start_manifest(PROCESS_MANIFEST, PROCESS_COMPLETE) as manifest:
+        for out_path, processed, seconds in process_files(tasks(), args.workers):
+            filename = os.path.basename(out_path).replace(".json", ".html")
+            digest = hashes.get(filename)
+            if digest is not None:
+                state[filename] = digest
             results.append(out_path)
+            reused += not processed
+            manifest.write(json.dumps({
+                "file": os.path.basename(out_path),
+                "path": out_path,
+                "sha256": digest,
+                "changed": processed,
+                "ts": time.time()
+            }) + "\n")
+            manifest.flush()
+            stage.record(
+                filename, seconds,
+                bytes_in=os.path.getsize(os.path.join(RAW_DIR, filename)) if processed else 0,
+                bytes_out=os.path.getsize(out_path) if processed else 0,
+                queue_wait=waits.pop(filename, None),
+                changed=processed
+            )
+    save_state(state)
 
     status = {
         "timestamp": datetime.now(timezone.utc).isoformat(),
         "files_processed": len(results),
+        "files_unchanged": reused,
+        "workers": args.workers,
         "results": results
     }
-    with open("/shared/status/process_complete.json", "w") as f:
-        json.dump(status, f, indent=2)
+    stage.publish()
+    write_complete(PROCESS_COMPLETE, status)
     
     print(f"[{datetime.now(timezone.utc).isoformat()}] Processor complete", flush=True)
 
@@ -1,10 +1,17 @@
-﻿param()
+﻿param(
+    # also delete the shared volume: checkpoint, incremental state and HTTP cache start over
+    [switch]$Clean
+)
 
 Write-Output "Starting Multi-Container Pipeline"
 Write-Output "================================="
 
-# Clean previous runs
-docker-compose down -v 2>$null
+# Stop previous runs; the shared volume keeps state, checkpoint and cache unless -Clean
+if ($Clean) {
+    docker-compose down -v 2>$null
+} else {
+    docker-compose down 2>$null
+}
 
 # Create temp directory
 $tempDir = New-Item -ItemType Directory -Force -Path (Join-Path $env:TEMP ("pipeline_" + [guid]::NewGuid()))
@@ -20,8 +27,9 @@ Write-Output ""
 Write-Output "Building containers..."
 docker-compose build
 
-# Start pipeline
+# Start pipeline; the run id lets each stage tell this run's handoff files from stale ones
 Write-Output "Starting pipeline..."
+$env:PIPELINE_RUN_ID = [guid]::NewGuid().ToString()
 docker-compose up -d
 
 # Wait for containers to initialize
@@ -37,7 +45,7 @@ $maxWait = 300  # 5 minutes
 $elapsed = 0
 
 while ($elapsed -lt $maxWait) {
-    $exists = docker exec pipeline-analyzer test -f /shared/analysis/final_report.json 2>$null
+    $exists = docker exec pipeline-analyzer grep -q $env:PIPELINE_RUN_ID /shared/analysis/final_report.json 2>$null
     if ($LASTEXITCODE -eq 0) {
         Write-Output "Pipeline complete"
         break
@@ -66,6 +74,26 @@ if (Test-Path "output/final_report.json") {
     Write-Output ""
     Write-Output "Results saved to output/final_report.json"
     python -m json.tool output/final_report.json | Select-Object -First 20
+
+    # Per-stage timings and the critical path written by the containers
+    if (Test-Path "output/status/metrics.json") {
+        $metrics = Get-Content "output/status/metrics.json" -Raw | ConvertFrom-Json
+        Write-Output ""
+        Write-Output "Stage metrics"
+        Write-Output "-------------"
+        foreach ($name in @("fetcher", "processor", "analyzer")) {
+            $stage = $metrics.stages.$name
+            if ($null -eq $stage) { continue }
+            Write-Output ("{0,-10} {1,8:N2}s wall {2,8:N2}s busy {3,8:N2}s waiting {4,5} docs {5,8:N1} docs/s" -f `
+                $name, $stage.wall_seconds, $stage.busy_seconds, $stage.queue_wait_seconds, $stage.documents, $stage.docs_per_sec)
+        }
+        $critical = $metrics.critical_path
+        Write-Output ""
+        Write-Output ("Critical path: {0:N2}s end to end, bottleneck: {1}" -f $critical.total_seconds, $critical.bottleneck)
+        foreach ($segment in $critical.segments) {
+            Write-Output ("  {0,-10} +{1:N2}s" -f $segment.stage, $segment.seconds)
+        }
+    }
 } else {
     Write-Output "Pipeline failed - no output generated"
     exit 1
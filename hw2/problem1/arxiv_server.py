@@ -1,29 +1,356 @@
 #!/usr/bin/env python3
 import sys
 import os
+import gzip
+import hashlib
+import zlib
 import json
 import re
+import math
+import argparse
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 from http.server import HTTPServer, BaseHTTPRequestHandler
-from urllib.parse import urlparse, parse_qs
-from datetime import datetime
+from urllib.parse import urlparse, parse_qs, urlencode
+from datetime import datetime, timezone
 
-DATA_DIR = os.path.join(os.path.dirname(__file__), "sample_data")
+DATA_DIR = os.environ.get("ARXIV_DATA_DIR", os.path.join(os.path.dirname(__file__), "sample_data"))
 
-# load data
-try:
-    with open(os.path.join(DATA_DIR, "papers.json"), "r", encoding="utf-8") as f:
-        PAPERS = json.load(f)
-except FileNotFoundError:
-    PAPERS = []
+# seconds an idle kept-alive connection may hold a worker
+KEEPALIVE_TIMEOUT = 5
 
-try:
-    with open(os.path.join(DATA_DIR, "corpus_analysis.json"), "r", encoding="utf-8") as f:
-        CORPUS_STATS = json.load(f)
-except FileNotFoundError:
-    CORPUS_STATS = {}
+# bodies smaller than this are not worth compressing
+MIN_COMPRESS_BYTES = 1024
 
-# index papers by id
-PAPER_INDEX = {p["arxiv_id"]: p for p in PAPERS}
+# streamed responses are serialized and sent this many items at a time
+STREAM_BATCH = 256
+
+# fields /papers returns by default, and those fields= may ask for
+SUMMARY_FIELDS = ["arxiv_id", "title", "authors", "categories"]
+PAPER_FIELDS = ["arxiv_id", "title", "authors", "abstract", "categories", "published", "updated", "abstract_stats"]
+
+# encoded /papers/{id} responses kept per snapshot
+PAPER_CACHE_SIZE = 4096
+
+# BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+TOKEN_RE = re.compile(r"\w+")
+PHRASE_RE = re.compile(r'"([^"]*)"')
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(text.lower())
+
+
+class SearchIndex:
+    """Inverted index over paper titles and abstracts, scored with BM25.
+
+    Every paper is indexed as its title tokens followed by its abstract tokens, with a
+    one position gap so a phrase never spans both. For each term the postings are four
+    arrays: the paper numbers containing it, offsets into the positions array, the
+    positions themselves, and whether the term is in the title (1) and/or abstract (2)
+    of each paper. A term's frequency in a paper is its number of positions.
+    """
+
+    def __init__(self, papers):
+        self.papers = papers
+        self.postings = {}  # term -> (papers, offsets, positions, fields)
+        lengths = []
+        for doc, p in enumerate(papers):
+            # a paper missing either field is indexed without it rather than failing the load
+            title = tokenize(p.get("title") or "")
+            abstract = tokenize(p.get("abstract") or "")
+            lengths.append(len(title) + len(abstract))
+            positions = {}
+            for pos, term in enumerate(title):
+                positions.setdefault(term, []).append(pos)
+            for pos, term in enumerate(abstract, len(title) + 1):
+                positions.setdefault(term, []).append(pos)
+            for term, term_positions in positions.items():
+                entry = self.postings.get(term)
+                if entry is None:
+                    entry = self.postings[term] = (array("I"), array("I", [0]), array("I"), array("B"))
+                entry[0].append(doc)
+                entry[2].extend(term_positions)
+                entry[1].append(len(entry[2]))
+                entry[3].append((1 if term_positions[0] < len(title) else 0) |
+                                (2 if term_positions[-1] > len(title) else 0))
+        # the length part of the BM25 denominator, fixed per paper; 1.0 when every paper is empty
+        avg_length = (sum(lengths) / len(lengths) if lengths else 0.0) or 1.0
+        self.norms = array("d", (BM25_K1 * (1 - BM25_B + BM25_B * n / avg_length) for n in lengths))
+
+    def positions(self, term, doc):
+        # sorted positions of term in paper doc, empty if it does not occur there
+        entry = self.postings.get(term)
+        if entry is None:
+            return ()
+        docs, offsets, positions, _ = entry
+        i = bisect_left(docs, doc)
+        if i == len(docs) or docs[i] != doc:
+            return ()
+        return positions[offsets[i]:offsets[i + 1]]
+
+    def has_phrase(self, phrase, doc):
+        starts = set(self.positions(phrase[0], doc))
+        for k, term in enumerate(phrase[1:], 1):
+            starts &= {pos - k for pos in self.positions(term, doc)}
+            if not starts:
+                return False
+        return True
+
+    def search(self, query):
+        """Return the /search response for query, best BM25 score first.
+
+        Words match whole tokens and any of them is enough; every "quoted phrase" in the
+        query must also appear verbatim.
+        """
+        terms = tokenize(query)
+        phrases = [phrase for phrase in map(tokenize, PHRASE_RE.findall(query)) if len(phrase) > 1]
+
+        candidates = None
+        if phrases:
+            # only papers holding every phrase word are checked, and only those are scored
+            phrase_terms = {t for phrase in phrases for t in phrase}
+            postings = [self.postings.get(t, ((),))[0] for t in phrase_terms]
+            candidates = set(min(postings, key=len))
+            for docs in postings:
+                candidates.intersection_update(docs)
+            candidates = sorted(d for d in candidates if all(self.has_phrase(phrase, d) for phrase in phrases))
+
+        n = len(self.papers)
+        norms = self.norms
+        scores = {}
+        fields = {}
+        for term in dict.fromkeys(terms):
+            entry = self.postings.get(term)
+            if entry is None:
+                continue
+            docs, offsets, _, term_fields = entry
+            gain = math.log(1 + (n - len(docs) + 0.5) / (len(docs) + 0.5)) * (BM25_K1 + 1)
+            if candidates is None:
+                matches = zip(docs, offsets, islice(offsets, 1, None), term_fields)
+            else:
+                matches = []
+                for doc in candidates:
+                    i = bisect_left(docs, doc)
+                    if i < len(docs) and docs[i] == doc:
+                        matches.append((doc, offsets[i], offsets[i + 1], term_fields[i]))
+            for doc, start, end, flags in matches:
+                tf = end - start
+                scores[doc] = scores.get(doc, 0.0) + gain * tf / (tf + norms[doc])
+                fields[doc] = fields.get(doc, 0) | flags
+
+        results = []
+        papers = self.papers
+        matches_in = {1: ["title"], 2: ["abstract"], 3: ["title", "abstract"]}
+        # ties keep corpus order
+        for doc in sorted(sorted(scores), key=scores.__getitem__, reverse=True):
+            p = papers[doc]
+            results.append({
+                "arxiv_id": p["arxiv_id"],
+                "title": p.get("title", ""),
+                "match_score": round(scores[doc], 4),
+                "matches_in": list(matches_in[fields[doc]]),
+            })
+        return {"query": " ".join(terms), "results": results}
+
+
+class EncodedResponse:
+    """A JSON body serialized once, with gzip/deflate variants and an ETag for each."""
+
+    def __init__(self, obj):
+        body = json.dumps(obj, indent=2).encode("utf-8")
+        self.variants = {"identity": body}
+        if len(body) >= MIN_COMPRESS_BYTES:
+            self.variants["gzip"] = gzip.compress(body, mtime=0)
+            self.variants["deflate"] = zlib.compress(body)
+        digest = hashlib.sha1(body).hexdigest()[:20]
+        self.etags = {enc: f'"{digest}"' if enc == "identity" else f'"{digest}-{enc}"' for enc in self.variants}
+        self.size = sum(len(v) for v in self.variants.values())
+
+
+def choose_encoding(accept_encoding, variants):
+    # first of gzip/deflate that the client accepts (q > 0) and the response has
+    accepted = set()
+    for item in accept_encoding.split(","):
+        name, _, params = item.partition(";")
+        key, _, value = params.partition("=")
+        try:
+            q = float(value) if key.strip() == "q" else 1.0
+        except ValueError:
+            q = 0.0
+        if q > 0:
+            accepted.add(name.strip().lower())
+    for enc in ("gzip", "deflate"):
+        if enc in variants and (enc in accepted or "*" in accepted):
+            return enc
+    return "identity"
+
+
+def etag_matches(if_none_match, etag):
+    if not if_none_match:
+        return False
+    tags = [t.strip() for t in if_none_match.split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+
+class LRUCache:
+    """Thread-safe mapping that keeps the maxsize most recently used entries."""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self.lock:
+            value = self.entries.get(key)
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self.entries.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+
+def papers_summary(papers):
+    return [project(p, SUMMARY_FIELDS) for p in papers]
+
+
+def project(paper, fields):
+    return {f: paper.get(f, [] if f == "categories" else None) for f in fields}
+
+
+def papers_query(query):
+    """Validate the /papers parameters; returns (offset, limit, fields, stream).
+
+    Raises ValueError with a message for the client on a bad value.
+    """
+    def integer(name, default, minimum):
+        if name not in query:
+            return default
+        try:
+            value = int(query[name][0])
+        except ValueError:
+            raise ValueError(f"{name} must be an integer")
+        if value < minimum:
+            raise ValueError(f"{name} must be >= {minimum}")
+        return value
+
+    offset = integer("offset", 0, 0)
+    limit = integer("limit", None, 1)
+    fields = SUMMARY_FIELDS
+    if "fields" in query:
+        fields = list(dict.fromkeys(f.strip() for f in query["fields"][0].split(",") if f.strip()))
+        unknown = [f for f in fields if f not in PAPER_FIELDS]
+        if unknown or not fields:
+            raise ValueError(f"fields must be a comma-separated subset of {','.join(PAPER_FIELDS)}")
+    stream = query.get("stream", ["0"])[0].lower() in ("1", "true", "yes")
+    return offset, limit, fields, stream
+
+
+def load_json(path, default):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return default
+
+
+def data_files(data_dir):
+    return [os.path.join(data_dir, "papers.json"), os.path.join(data_dir, "corpus_analysis.json")]
+
+
+def data_signature(data_dir):
+    # (mtime, size) of each data file, None for a missing one; changes when a file is rewritten
+    signature = []
+    for path in data_files(data_dir):
+        try:
+            st = os.stat(path)
+            signature.append((st.st_mtime_ns, st.st_size))
+        except FileNotFoundError:
+            signature.append(None)
+    return tuple(signature)
+
+
+class CorpusSnapshot:
+    """One version of the corpus with everything the handlers derive from it.
+
+    A snapshot is never modified once built (apart from its response cache). A reload
+    builds a new one and replaces the SNAPSHOT reference; requests read SNAPSHOT once,
+    so those in flight finish on the version they started with.
+    """
+
+    def __init__(self, data_dir):
+        self.signature = data_signature(data_dir)
+        start = time.perf_counter()
+        papers_path, stats_path = data_files(data_dir)
+        self.papers = load_json(papers_path, [])
+        self.stats = load_json(stats_path, {})
+        self.load_seconds = time.perf_counter() - start
+
+        # index papers by id, and their text for /search
+        start = time.perf_counter()
+        self.paper_index = {p["arxiv_id"]: p for p in self.papers}
+        self.search_index = SearchIndex(self.papers)
+        # the snapshot does not change, so these bodies are encoded once
+        self.papers_response = EncodedResponse(papers_summary(self.papers))
+        self.stats_response = EncodedResponse(self.stats) if self.stats else None
+        # encoded /papers/{id} bodies of recently requested papers
+        self.paper_responses = LRUCache(PAPER_CACHE_SIZE)
+        self.index_seconds = time.perf_counter() - start
+        self.loaded_at = datetime.now(timezone.utc).isoformat()
+
+
+SNAPSHOT = CorpusSnapshot(DATA_DIR)
+RELOADS = {"reloads": 0, "failures": 0, "last_error": None}
+
+
+def reload_snapshot(data_dir):
+    """Build a snapshot of the current files and swap it in; on failure keep serving the old one."""
+    global SNAPSHOT
+    try:
+        snapshot = CorpusSnapshot(data_dir)
+    except Exception as e:
+        RELOADS["failures"] += 1
+        RELOADS["last_error"] = f"{type(e).__name__}: {e}"
+        log_request("RELOAD", data_dir, "failed", f"({e})")
+        return False
+    # a single reference assignment, so a request sees either the old snapshot or the new one
+    SNAPSHOT = snapshot
+    RELOADS["reloads"] += 1
+    RELOADS["last_error"] = None
+    log_request("RELOAD", data_dir, "ok", f"({len(snapshot.papers)} papers, load {snapshot.load_seconds:.2f}s,"
+                                          f" index {snapshot.index_seconds:.2f}s)")
+    return True
+
+
+def watch_data(data_dir, interval):
+    # polls the data files and reloads when they change; runs in a daemon thread
+    seen = SNAPSHOT.signature
+    while True:
+        time.sleep(interval)
+        signature = data_signature(data_dir)
+        # a file that failed to load is not retried until it changes again
+        if signature != seen:
+            seen = signature
+            reload_snapshot(data_dir)
 
 
 def log_request(method, path, code, extra=""):
@@ -33,42 +360,139 @@ def log_request(method, path, code, extra=""):
 
 
 class ArxivHandler(BaseHTTPRequestHandler):
-    def _set_headers(self, code=200, content_type="application/json"):
+    # HTTP/1.1 keeps connections open between requests, so every response needs a Content-Length
+    protocol_version = "HTTP/1.1"
+    timeout = KEEPALIVE_TIMEOUT
+    # headers and body go out as separate writes; with Nagle on, the body of a kept-alive
+    # response waits ~40 ms for the client's delayed ACK
+    disable_nagle_algorithm = True
+    # serve gzip/deflate bodies to clients that accept them
+    compress = True
+
+    def end_headers(self):
+        super().end_headers()
+        self.headers_sent = True
+
+    def _set_headers(self, code=200, content_type="application/json", length=None, headers=None):
         self.send_response(code)
         self.send_header("Content-Type", content_type)
+        if length is not None:
+            self.send_header("Content-Length", str(length))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
         self.end_headers()
 
-    def _send_json(self, obj, code=200):
-        self._set_headers(code)
-        self.wfile.write(json.dumps(obj, indent=2).encode("utf-8"))
+    def _send_json(self, obj, code=200, headers=None):
+        body = json.dumps(obj, indent=2).encode("utf-8")
+        self._set_headers(code, length=len(body), headers=headers)
+        self.wfile.write(body)
+
+    def _stream_json_array(self, items, headers=None):
+        """Write items as the same JSON array _send_json would, STREAM_BATCH items at a time.
+
+        Only one batch is held in memory. HTTP/1.1 clients get chunked transfer encoding;
+        HTTP/1.0 ones get the body up to connection close.
+        """
+        chunked = self.request_version == "HTTP/1.1" and self.protocol_version == "HTTP/1.1"
+        headers = dict(headers or {})
+        if chunked:
+            headers["Transfer-Encoding"] = "chunked"
+        else:
+            self.close_connection = True
+        self._set_headers(200, headers=headers)
+
+        def write(data):
+            if chunked:
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+            else:
+                self.wfile.write(data)
+
+        count = 0
+        while True:
+            batch = list(islice(items, STREAM_BATCH))
+            if not batch:
+                break
+            # a batch encoded as an array, minus its brackets, is that stretch of the full array
+            text = json.dumps(batch, indent=2)[2:-2]
+            write((("[\n" if count == 0 else ",\n") + text).encode("utf-8"))
+            count += len(batch)
+        write(b"\n]" if count else b"[]")
+        if chunked:
+            self.wfile.write(b"0\r\n\r\n")
+        return count
+
+    def _send_encoded(self, resp, code=200):
+        # pre-encoded body in the best accepted encoding, or 304 if the client's copy is current
+        enc = choose_encoding(self.headers.get("Accept-Encoding", ""), resp.variants) if self.compress else "identity"
+        etag = resp.etags[enc]
+        if etag_matches(self.headers.get("If-None-Match"), etag):
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Vary", "Accept-Encoding")
+            self.end_headers()
+            return 304
+        body = resp.variants[enc]
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.send_header("Vary", "Accept-Encoding")
+        if enc != "identity":
+            self.send_header("Content-Encoding", enc)
+        self.end_headers()
+        self.wfile.write(body)
+        return code
 
     def do_GET(self):
         parsed = urlparse(self.path)
         path = parsed.path
         query = parse_qs(parsed.query)
+        # one snapshot for the whole request, even if a reload swaps in another meanwhile
+        snap = SNAPSHOT
+        self.headers_sent = False
 
         try:
             #  get /papers
             if path == "/papers":
-                papers_summary = [
-                    {
-                        "arxiv_id": p["arxiv_id"],
-                        "title": p["title"],
-                        "authors": p["authors"],
-                        "categories": p.get("categories", []),
-                    }
-                    for p in PAPERS
-                ]
-                self._send_json(papers_summary, 200)
-                log_request("GET", path, 200, f"({len(papers_summary)} results)")
+                if not query:
+                    code = self._send_encoded(snap.papers_response)
+                    log_request("GET", path, code, f"({len(snap.papers)} results)")
+                    return
+                try:
+                    offset, limit, fields, stream = papers_query(query)
+                except ValueError as e:
+                    self._send_json({"error": str(e)}, 400)
+                    log_request("GET", self.path, 400)
+                    return
+
+                total = len(snap.papers)
+                end = total if limit is None else min(total, offset + limit)
+                # the page stays an array; the total and the next page's link go in headers
+                headers = {"X-Total-Count": str(total)}
+                if end < total:
+                    params = {k: v[0] for k, v in query.items()}
+                    params["offset"] = end
+                    headers["Link"] = f'</papers?{urlencode(params)}>; rel="next"'
+                page = (project(snap.papers[i], fields) for i in range(offset, end))
+                if stream:
+                    count = self._stream_json_array(page, headers)
+                else:
+                    results = list(page)
+                    count = len(results)
+                    self._send_json(results, 200, headers)
+                log_request("GET", self.path, 200, f"({count} results)")
                 return
 
             # get /papers/{id}
             if path.startswith("/papers/"):
                 paper_id = path.split("/")[-1]
-                if paper_id in PAPER_INDEX:
-                    self._send_json(PAPER_INDEX[paper_id], 200)
-                    log_request("GET", path, 200)
+                if paper_id in snap.paper_index:
+                    resp = snap.paper_responses.get(paper_id)
+                    if resp is None:
+                        resp = EncodedResponse(snap.paper_index[paper_id])
+                        snap.paper_responses.put(paper_id, resp)
+                    code = self._send_encoded(resp)
+                    log_request("GET", path, code)
                 else:
                     self._send_json({"error": "Paper not found"}, 404)
                     log_request("GET", path, 404)
@@ -81,44 +505,33 @@ class ArxivHandler(BaseHTTPRequestHandler):
                     log_request("GET", path, 400)
                     return
 
-                terms = [t.lower() for t in re.findall(r"\w+", query["q"][0])]
-                results = []
-                for p in PAPERS:
-                    score = 0
-                    matches_in = []
-                    title = p["title"].lower()
-                    abstract = p["abstract"].lower()
-
-                    for t in terms:
-                        if t in title:
-                            score += title.count(t)
-                            if "title" not in matches_in:
-                                matches_in.append("title")
-                        if t in abstract:
-                            score += abstract.count(t)
-                            if "abstract" not in matches_in:
-                                matches_in.append("abstract")
-
-                    if score > 0:
-                        results.append({
-                            "arxiv_id": p["arxiv_id"],
-                            "title": p["title"],
-                            "match_score": score,
-                            "matches_in": matches_in,
-                        })
-
-                resp = {"query": " ".join(terms), "results": results}
+                resp = snap.search_index.search(query["q"][0])
                 self._send_json(resp, 200)
-                log_request("GET", f"{path}?q={query['q'][0]}", 200, f"({len(results)} matches)")
+                log_request("GET", f"{path}?q={query['q'][0]}", 200, f"({len(resp['results'])} matches)")
                 return
 
             # get /stats
             if path == "/stats":
-                if not CORPUS_STATS:
+                if snap.stats_response is None:
                     self._send_json({"error": "Corpus stats are not available"}, 500)
                     log_request("GET", path, 500)
                     return
-                self._send_json(CORPUS_STATS, 200)
+                code = self._send_encoded(snap.stats_response)
+                log_request("GET", path, code)
+                return
+
+            # get /health
+            if path == "/health":
+                self._send_json({
+                    "status": "ok",
+                    "papers": len(snap.papers),
+                    "snapshot_loaded_at": snap.loaded_at,
+                    "load_seconds": round(snap.load_seconds, 4),
+                    "index_seconds": round(snap.index_seconds, 4),
+                    "reloads": RELOADS["reloads"],
+                    "reload_failures": RELOADS["failures"],
+                    "last_reload_error": RELOADS["last_error"],
+                }, 200)
                 log_request("GET", path, 200)
                 return
 
@@ -127,26 +540,114 @@ class ArxivHandler(BaseHTTPRequestHandler):
             log_request("GET", path, 404)
 
         except Exception as e:
-            self._send_json({"error": str(e)}, 500)
-            log_request("GET", path, 500, f"({e})")
+            if self.headers_sent:
+                # a 200 is already on the wire: cut the body short instead of appending a 500 to it
+                self.close_connection = True
+                log_request("GET", path, 200, f"(aborted: {e})")
+            else:
+                self._send_json({"error": str(e)}, 500)
+                log_request("GET", path, 500, f"({e})")
+
+
+class PooledHTTPServer(HTTPServer):
+    """HTTPServer that hands each connection to a fixed pool of worker threads.
+
+    A kept-alive connection holds its worker until the client closes it or stays idle for
+    KEEPALIVE_TIMEOUT seconds. At most `workers` connections are served at once and
+    `backlog` more wait for a worker; past that new clients are not accepted and wait in
+    the listen queue, so memory stays bounded under overload.
+    """
 
+    request_queue_size = 128
+    # longest the accept loop waits for a free slot before checking for shutdown() again
+    slot_timeout = 0.5
 
-def main():
-    port = 8080
-    if len(sys.argv) > 1:
+    def __init__(self, address, handler, workers=32, backlog=64):
+        super().__init__(address, handler)
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="http")
+        self.slots = threading.BoundedSemaphore(workers + backlog)
+
+    def get_request(self):
+        # an OSError makes serve_forever skip this round; the connection stays queued
+        if not self.slots.acquire(timeout=self.slot_timeout):
+            raise OSError("no free connection slot")
         try:
-            port = int(sys.argv[1])
-        except ValueError:
-            print("Error: port must be an integer")
-            sys.exit(1)
+            return super().get_request()
+        except OSError:
+            self.slots.release()
+            raise
+
+    def process_request(self, request, client_address):
+        try:
+            self.pool.submit(self.process_request_thread, request, client_address)
+        except Exception:
+            self.slots.release()
+            raise
+
+    def process_request_thread(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            self.slots.release()
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown(wait=True)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="ArXiv paper metadata API")
+    parser.add_argument("port", nargs="?", default="8080")
+    parser.add_argument("--workers", type=int, default=32,
+                        help="threads serving connections; 0 serves one request at a time without keep-alive")
+    parser.add_argument("--backlog", type=int, default=64, help="accepted connections waiting for a worker")
+    parser.add_argument("--paper-cache", type=int, default=4096,
+                        help="encoded /papers/{id} responses kept in the LRU cache")
+    parser.add_argument("--no-compress", action="store_true",
+                        help="always send identity bodies, ignoring Accept-Encoding")
+    parser.add_argument("--reload-interval", type=float, default=2,
+                        help="seconds between checks of the data files for changes; 0 disables hot reload")
+    args = parser.parse_args(argv)
+    try:
+        args.port = int(args.port)
+    except ValueError:
+        print("Error: port must be an integer")
+        sys.exit(1)
+    if args.workers < 0 or args.backlog < 0:
+        parser.error("--workers and --backlog must be >= 0")
+    if args.paper_cache < 1:
+        parser.error("--paper-cache must be >= 1")
+    if args.reload_interval < 0:
+        parser.error("--reload-interval must be >= 0")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    port = args.port
+    global PAPER_CACHE_SIZE
+    PAPER_CACHE_SIZE = SNAPSHOT.paper_responses.maxsize = args.paper_cache
+    ArxivHandler.compress = not args.no_compress
+    if args.reload_interval:
+        threading.Thread(target=watch_data, args=(DATA_DIR, args.reload_interval), daemon=True).start()
 
-    server = HTTPServer(("0.0.0.0", port), ArxivHandler)
-    print(f"Starting ArXiv API server on port {port}")
+    if args.workers:
+        server = PooledHTTPServer(("0.0.0.0", port), ArxivHandler, args.workers, args.backlog)
+        print(f"Starting ArXiv API server on port {port} ({args.workers} workers)")
+    else:
+        # a single thread would be held by one kept-alive client, so close after each response
+        ArxivHandler.protocol_version = "HTTP/1.0"
+        server = HTTPServer(("0.0.0.0", port), ArxivHandler)
+        print(f"Starting ArXiv API server on port {port}")
     print("Endpoints:")
-    print("  get /papers")
+    print("  get /papers?offset=&limit=&fields=&stream=1    (all parameters optional)")
     print("  get /papers/{arxiv_id}")
-    print("  get /search?q={query}")
+    print('  get /search?q={query}    (BM25 ranked; "quoted phrases" must match exactly)')
     print("  get /stats")
+    print("  get /health    (snapshot load/index times and reload counts)")
     server.serve_forever()
 
 
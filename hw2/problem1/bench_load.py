@@ -0,0 +1,173 @@
+import sys
+import os
+import json
+import time
+import random
+import socket
+import tempfile
+import threading
+import subprocess
+import http.client
+
+from bench_search import make_papers
+
+"""
+Load test for arxiv_server.py
+Serves a synthetic corpus from a server subprocess and drives it with keep-alive clients
+that mostly fetch /papers/{id} with some slow /search requests mixed in, reporting
+requests/sec and p50/p99 latency per serving mode and concurrency level
+"""
+
+NUM_PAPERS = 20000
+DURATION_S = 5.0
+SEARCH_SHARE = 0.05        # fraction of requests that are a (slow) /search
+SEARCH_QUERY = "/search?q=term20"
+CONCURRENCY = [1, 4, 16, 64]
+MODES = [("single", ["--workers", "0"]), ("pooled", ["--workers", "64"])]
+
+
+def write_corpus(data_dir, count=NUM_PAPERS):
+    papers = make_papers(count)
+    for i, p in enumerate(papers):
+        p["authors"] = [f"Author {i % 997}"]
+        p["categories"] = ["cs.LG"]
+    with open(os.path.join(data_dir, "papers.json"), "w", encoding="utf-8") as f:
+        json.dump(papers, f)
+    # stats from the bundled sample, so /stats has a realistic size
+    with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "sample_data", "corpus_analysis.json"),
+              encoding="utf-8") as f:
+        stats = json.load(f)
+    stats["papers_processed"] = len(papers)
+    with open(os.path.join(data_dir, "corpus_analysis.json"), "w", encoding="utf-8") as f:
+        json.dump(stats, f)
+    return [p["arxiv_id"] for p in papers]
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(data_dir, port, extra_args, script="arxiv_server.py"):
+    env = dict(os.environ, ARXIV_DATA_DIR=data_dir)
+    proc = subprocess.Popen([sys.executable, script, str(port)] + extra_args, env=env,
+                            cwd=os.path.dirname(os.path.abspath(__file__)),
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+            conn.request("GET", "/stats")
+            conn.getresponse().read()
+            conn.close()
+            return proc
+        except OSError:
+            time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError("server did not start")
+
+
+def client(port, ids, seed, stop_at, latencies, counters):
+    rng = random.Random(seed)
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    connections = 1
+    errors = 0
+    while time.perf_counter() < stop_at:
+        search = rng.random() < SEARCH_SHARE
+        path = SEARCH_QUERY if search else f"/papers/{rng.choice(ids)}"
+        start = time.perf_counter()
+        try:
+            conn.request("GET", path)
+            resp = conn.getresponse()
+            body = resp.read()
+        except OSError:
+            # refused or timed out, e.g. the listen queue overflowed
+            errors += 1
+            conn.close()
+            connections += 1
+            continue
+        latencies.append((search, time.perf_counter() - start))
+        assert resp.status == 200 and len(body) == int(resp.getheader("Content-Length")), path
+        if resp.will_close:
+            # HTTP/1.0 server: http.client reconnects on the next request
+            connections += 1
+    conn.close()
+    counters.append((connections, errors))
+
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def run_load(port, ids, concurrency):
+    latencies = []
+    counters = []
+    stop_at = time.perf_counter() + DURATION_S
+    threads = [threading.Thread(target=client, args=(port, ids, i, stop_at, latencies, counters))
+               for i in range(concurrency)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    lookups = sorted(s for search, s in latencies if not search)
+    everything = sorted(s for _, s in latencies)
+    return {
+        "requests": len(latencies),
+        "rps": len(latencies) / elapsed,
+        "p50": percentile(everything, 0.5),
+        "p99": percentile(everything, 0.99),
+        "lookup_p50": percentile(lookups, 0.5),
+        "lookup_p99": percentile(lookups, 0.99),
+        "connections": sum(c for c, _ in counters),
+        "errors": sum(e for _, e in counters),
+    }
+
+
+def check_shutdown():
+    # every slot busy and one more client queued: shutdown() must not wait for a slot to free up
+    import arxiv_server
+    server = arxiv_server.PooledHTTPServer(("127.0.0.1", 0), arxiv_server.ArxivHandler, workers=1, backlog=0)
+    port = server.server_address[1]
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    held = http.client.HTTPConnection("127.0.0.1", port, timeout=10)
+    held.request("GET", "/health")
+    held.getresponse().read()  # kept alive, so it keeps the only worker
+    queued = socket.create_connection(("127.0.0.1", port))
+    time.sleep(0.2)
+    start = time.perf_counter()
+    server.shutdown()
+    elapsed = time.perf_counter() - start
+    held.close()
+    queued.close()
+    server.server_close()
+    print(f"shutdown with every slot busy: {elapsed:.2f}s")
+    assert elapsed < 2 * server.slot_timeout, elapsed
+
+
+def main():
+    check_shutdown()
+    with tempfile.TemporaryDirectory() as tmp:
+        ids = write_corpus(tmp)
+        print(f"{NUM_PAPERS} papers, {DURATION_S:g}s per level, {SEARCH_SHARE:.0%} of requests are {SEARCH_QUERY}")
+        for mode, extra_args in MODES:
+            port = free_port()
+            proc = start_server(tmp, port, extra_args)
+            try:
+                for concurrency in CONCURRENCY:
+                    r = run_load(port, ids, concurrency)
+                    print(f"  {mode:<7} clients={concurrency:<3} {r['rps']:7.0f} req/s"
+                          f"  p50 {r['p50'] * 1000:7.1f} ms  p99 {r['p99'] * 1000:7.1f} ms"
+                          f"  /papers/{{id}} p50 {r['lookup_p50'] * 1000:7.1f} ms  p99 {r['lookup_p99'] * 1000:7.1f} ms"
+                          f"  connections={r['connections']} errors={r['errors']}")
+            finally:
+                proc.terminate()
+                proc.wait()
+
+
+if __name__ == "__main__":
+    main()
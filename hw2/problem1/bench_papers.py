@@ -0,0 +1,135 @@
+import json
+import time
+import socket
+import tempfile
+import itertools
+import threading
+import http.client
+
+from bench_load import write_corpus, free_port, start_server
+
+"""
+Benchmark for /papers pagination, projection and streaming in arxiv_server.py
+Requests a large synthetic corpus whole, streamed and page by page, reporting time to
+first byte, total time, body size and how much the server's peak RSS grew
+"""
+
+NUM_PAPERS = 100000
+FULL = "fields=arxiv_id,title,authors,abstract"
+
+
+def reset_peak_rss(pid):
+    # writing 5 to clear_refs resets VmHWM to the current RSS (Linux)
+    with open(f"/proc/{pid}/clear_refs", "w") as f:
+        f.write("5")
+
+
+def rss_mb(pid, field):
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith(field + ":"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def fetch(port, path):
+    # returns (time to first body byte, total time, body)
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=120)
+    start = time.perf_counter()
+    conn.request("GET", path)
+    resp = conn.getresponse()
+    first = resp.read(1)
+    first_byte = time.perf_counter() - start
+    body = first + resp.read()
+    total = time.perf_counter() - start
+    assert resp.status == 200, (path, resp.status)
+    link = resp.getheader("Link")
+    conn.close()
+    return first_byte, total, body, link
+
+
+def walk_pages(port, path):
+    # follows the rel="next" links; returns the papers of every page
+    papers = []
+    pages = 0
+    start = time.perf_counter()
+    while path:
+        _, _, body, link = fetch(port, path)
+        papers.extend(json.loads(body))
+        pages += 1
+        path = link[1:link.index(">")] if link else None
+    return time.perf_counter() - start, pages, papers
+
+
+def check_stream_error():
+    # a failure after the 200 headers went out must close the connection, not append a 500 to the body
+    import arxiv_server
+    with tempfile.TemporaryDirectory() as tmp:
+        write_corpus(tmp, 1000)
+        arxiv_server.reload_snapshot(tmp)
+    project = arxiv_server.project
+    calls = itertools.count()
+
+    def failing_project(paper, fields):
+        if next(calls) == arxiv_server.STREAM_BATCH + 44:
+            raise ValueError("simulated failure")
+        return project(paper, fields)
+
+    arxiv_server.project = failing_project
+    server = arxiv_server.PooledHTTPServer(("127.0.0.1", 0), arxiv_server.ArxivHandler, workers=1)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        # recv times out if the server keeps the connection open
+        with socket.create_connection(server.server_address, timeout=3) as sock:
+            sock.sendall(b"GET /papers?stream=1 HTTP/1.1\r\nHost: localhost\r\n\r\n")
+            data = b""
+            while True:
+                chunk = sock.recv(65536)
+                if not chunk:
+                    break
+                data += chunk
+    finally:
+        arxiv_server.project = project
+        server.shutdown()
+        server.server_close()
+    head, _, body = data.partition(b"\r\n\r\n")
+    assert head.startswith(b"HTTP/1.1 200"), head
+    assert b"HTTP/1.1 500" not in body and not body.endswith(b"0\r\n\r\n"), body[-200:]
+    print(f"failure mid-stream: connection closed after {len(body)} body bytes, no 500 appended")
+
+
+def main():
+    check_stream_error()
+    with tempfile.TemporaryDirectory() as tmp:
+        write_corpus(tmp, NUM_PAPERS)
+        port = free_port()
+        proc = start_server(tmp, port, ["--workers", "4"])
+        try:
+            print(f"{NUM_PAPERS} papers, server rss after startup {rss_mb(proc.pid, 'VmRSS'):.0f} MiB")
+            bodies = {}
+            for label, path in [("whole", f"/papers?{FULL}"), ("streamed", f"/papers?{FULL}&stream=1"),
+                                ("page of 100", f"/papers?{FULL}&limit=100&offset=50000"),
+                                ("ids only", "/papers?fields=arxiv_id&stream=1")]:
+                reset_peak_rss(proc.pid)
+                before = rss_mb(proc.pid, "VmRSS")
+                first_byte, total, body, _ = fetch(port, path)
+                growth = rss_mb(proc.pid, "VmHWM") - before
+                bodies[label] = body
+                print(f"  {label:<12} first byte {first_byte * 1000:8.1f} ms  total {total * 1000:8.1f} ms"
+                      f"  {len(body) / 1e6:7.1f} MB  peak rss +{growth:6.1f} MiB")
+            # streaming must not change a byte of the response
+            assert bodies["whole"] == bodies["streamed"]
+
+            reset_peak_rss(proc.pid)
+            before = rss_mb(proc.pid, "VmRSS")
+            seconds, pages, papers = walk_pages(port, f"/papers?{FULL}&limit=1000")
+            assert papers == json.loads(bodies["whole"])
+            print(f"  {pages} pages of 1000 via Link headers {seconds:6.2f}s"
+                  f"  peak rss +{rss_mb(proc.pid, 'VmHWM') - before:6.1f} MiB")
+        finally:
+            proc.terminate()
+            proc.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+import os
+import json
+import time
+import tempfile
+import threading
+import http.client
+
+from bench_load import write_corpus, free_port, start_server, client, percentile
+
+"""
+Test for hot reload in arxiv_server.py
+Keeps keep-alive clients busy while papers.json is replaced by a larger corpus, then by
+a broken file, and checks that no request fails, that the new corpus is served once
+/health reports the reload, and that a broken file leaves the old snapshot in place
+"""
+
+OLD_PAPERS = 20000
+NEW_PAPERS = 40000
+CLIENTS = 8
+
+
+def get_json(port, path):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    conn.request("GET", path)
+    resp = conn.getresponse()
+    body = json.loads(resp.read())
+    conn.close()
+    return resp.status, body
+
+
+def replace_file(path, data):
+    # how a producer should publish a new corpus: write aside, then rename over
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        f.write(data)
+    os.replace(path + ".tmp", path)
+
+
+def wait_for(port, predicate, timeout=120):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        status, health = get_json(port, "/health")
+        if predicate(health):
+            return health
+        time.sleep(0.1)
+    raise AssertionError(f"timed out waiting, last /health: {health}")
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp, tempfile.TemporaryDirectory() as new_dir:
+        ids = write_corpus(tmp, OLD_PAPERS)
+        new_ids = write_corpus(new_dir, NEW_PAPERS)
+        # the first papers of the larger corpus are the old ones, so clients' ids stay valid
+        assert new_ids[:OLD_PAPERS] == ids
+        with open(os.path.join(new_dir, "papers.json"), encoding="utf-8") as f:
+            new_papers = f.read()
+
+        port = free_port()
+        proc = start_server(tmp, port, ["--workers", "16", "--reload-interval", "0.5"])
+        try:
+            health = get_json(port, "/health")[1]
+            print(f"startup: {health['papers']} papers, load {health['load_seconds']}s, index {health['index_seconds']}s")
+
+            latencies, counters = [], []
+            stop_at = time.perf_counter() + 30
+            threads = [threading.Thread(target=client, args=(port, ids, i, stop_at, latencies, counters))
+                       for i in range(CLIENTS)]
+            for t in threads:
+                t.start()
+            time.sleep(2)
+
+            swapped = time.perf_counter()
+            replace_file(os.path.join(tmp, "papers.json"), new_papers)
+            health = wait_for(port, lambda h: h["reloads"] == 1)
+            print(f"reload: visible after {time.perf_counter() - swapped:.2f}s, {health['papers']} papers,"
+                  f" load {health['load_seconds']}s, index {health['index_seconds']}s")
+            assert health["papers"] == NEW_PAPERS
+            assert get_json(port, f"/papers/{new_ids[-1]}")[0] == 200
+
+            replace_file(os.path.join(tmp, "papers.json"), new_papers[:len(new_papers) // 2])
+            health = wait_for(port, lambda h: h["reload_failures"] == 1)
+            print(f"broken file: failures={health['reload_failures']} error={health['last_reload_error'][:60]!r},"
+                  f" still serving {health['papers']} papers")
+            assert health["papers"] == NEW_PAPERS
+
+            for t in threads:
+                t.join()
+            errors = sum(e for _, e in counters)
+            lookups = sorted(s for search, s in latencies if not search)
+            print(f"clients: {len(latencies)} requests, {errors} errors,"
+                  f" /papers/{{id}} p50 {percentile(lookups, 0.5) * 1000:.1f} ms"
+                  f" p99 {percentile(lookups, 0.99) * 1000:.1f} ms")
+            assert errors == 0
+        finally:
+            proc.terminate()
+            proc.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+import sys
+import os
+import gzip
+import time
+import random
+import tempfile
+import http.client
+
+from bench_load import write_corpus, free_port, start_server
+
+"""
+Benchmark for the pre-encoded responses in arxiv_server.py
+Times /papers, /stats and /papers/{id} from one keep-alive client as plain, gzip and
+ETag-revalidated (304) requests. An older server script given as the first argument
+(e.g. from `git show HEAD~1:hw2/problem1/arxiv_server.py`) is timed the same way
+"""
+
+REQUESTS = 200
+
+
+def fetch(conn, path, headers=None):
+    start = time.perf_counter()
+    conn.request("GET", path, headers=headers or {})
+    resp = conn.getresponse()
+    body = resp.read()
+    return time.perf_counter() - start, resp, body
+
+
+def measure(port, paths, headers=None):
+    # median latency and body size over REQUESTS requests
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    timings = []
+    size = 0
+    for path in paths:
+        seconds, resp, body = fetch(conn, path, headers)
+        assert resp.status in (200, 304), (path, resp.status)
+        timings.append(seconds)
+        size = len(body)
+    conn.close()
+    timings.sort()
+    return timings[len(timings) // 2], size
+
+
+def bench(label, port, ids):
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    _, resp, plain = fetch(conn, "/papers")
+    etag = resp.getheader("ETag")
+    _, resp, packed = fetch(conn, "/papers", {"Accept-Encoding": "gzip"})
+    if resp.getheader("Content-Encoding") == "gzip":
+        # the compressed variant must decode to the same body
+        assert gzip.decompress(packed) == plain
+    conn.close()
+
+    rng = random.Random(0)
+    cases = [
+        ("/papers", ["/papers"] * REQUESTS, None),
+        ("/papers gzip", ["/papers"] * REQUESTS, {"Accept-Encoding": "gzip"}),
+        ("/papers 304", ["/papers"] * REQUESTS, {"If-None-Match": etag or '"none"'}),
+        ("/stats", ["/stats"] * REQUESTS, None),
+        ("/papers/{id} x10", [f"/papers/{rng.choice(ids[:REQUESTS // 10])}" for _ in range(REQUESTS)], None),
+    ]
+    for name, paths, headers in cases:
+        seconds, size = measure(port, paths, headers)
+        print(f"  {label:<9} {name:<18} p50 {seconds * 1000:8.3f} ms  {size:>9} bytes")
+
+
+def main():
+    baseline = sys.argv[1] if len(sys.argv) > 1 else None
+    with tempfile.TemporaryDirectory() as tmp:
+        ids = write_corpus(tmp)
+        servers = [("encoded", os.path.join(os.path.dirname(os.path.abspath(__file__)), "arxiv_server.py"))]
+        if baseline:
+            servers.insert(0, ("baseline", os.path.abspath(baseline)))
+        for label, script in servers:
+            port = free_port()
+            proc = start_server(tmp, port, ["--workers", "4"], script)
+            try:
+                bench(label, port, ids)
+            finally:
+                proc.terminate()
+                proc.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+import sys
+import re
+import time
+import random
+from itertools import accumulate
+
+from arxiv_server import SearchIndex, tokenize
+
+"""
+Latency benchmark for /search in arxiv_server.py
+Builds the inverted index over synthetic corpora of several sizes, times queries against
+it and against the previous linear scan, and checks the matches with a brute-force pass
+"""
+
+SIZES = [1000, 100000, 1000000]
+VOCAB = [f"term{i}" for i in range(50000)] + ["the", "of", "and", "a", "we", "in", "to", "for"] * 200
+QUERIES = ["term4000", "term20", "term3 term17", "neural network", '"neural network"', '"graph neural network" term5']
+
+
+def make_papers(count, seed=0):
+    # Zipf-like word choice; some papers get "neural network" or "graph neural network" spliced in
+    rng = random.Random(seed)
+    cum_weights = list(accumulate(1 / (rank + 1) for rank in range(len(VOCAB))))
+    papers = []
+    for i in range(count):
+        words = rng.choices(VOCAB, cum_weights=cum_weights, k=rng.randint(30, 60))
+        extra = rng.random()
+        if extra < 0.05:
+            words[rng.randrange(len(words)):0] = ["graph", "neural", "network"]
+        elif extra < 0.15:
+            words[rng.randrange(len(words)):0] = ["neural", "network"]
+        elif extra < 0.25:
+            words[rng.randrange(len(words)):0] = ["network", "neural"]
+        papers.append({
+            "arxiv_id": f"{2301 + i // 100000}.{i % 100000:05d}",
+            "title": " ".join(rng.choices(VOCAB, cum_weights=cum_weights, k=rng.randint(5, 10))).capitalize(),
+            "abstract": " ".join(words) + ".",
+        })
+    return papers
+
+
+def search_reference(papers, q):
+    # the linear scan this replaced, kept verbatim for timing
+    terms = [t.lower() for t in re.findall(r"\w+", q)]
+    results = []
+    for p in papers:
+        score = 0
+        matches_in = []
+        title = p["title"].lower()
+        abstract = p["abstract"].lower()
+
+        for t in terms:
+            if t in title:
+                score += title.count(t)
+                if "title" not in matches_in:
+                    matches_in.append("title")
+            if t in abstract:
+                score += abstract.count(t)
+                if "abstract" not in matches_in:
+                    matches_in.append("abstract")
+
+        if score > 0:
+            results.append({
+                "arxiv_id": p["arxiv_id"],
+                "title": p["title"],
+                "match_score": score,
+                "matches_in": matches_in,
+            })
+    return {"query": " ".join(terms), "results": results}
+
+
+def brute_force_matches(papers, q):
+    # ids the index should return: any whole-word match, and every quoted phrase in one field
+    terms = set(tokenize(q))
+    phrases = [" ".join(tokenize(p)) for p in re.findall(r'"([^"]*)"', q)]
+    ids = set()
+    for p in papers:
+        fields = [tokenize(p["title"]), tokenize(p["abstract"])]
+        if not terms & set(fields[0] + fields[1]):
+            continue
+        if all(any(f" {phrase} " in f" {' '.join(f)} " for f in fields) for phrase in phrases):
+            ids.add(p["arxiv_id"])
+    return ids
+
+
+def timed(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    # optional cap on the corpus size the slow scan is run at
+    max_reference = int(sys.argv[1]) if len(sys.argv) > 1 else max(SIZES)
+    # empty or missing fields must not stop the index from building
+    assert SearchIndex([{"arxiv_id": "a", "title": "", "abstract": ""}]).search("x")["results"] == []
+    resp = SearchIndex([{"arxiv_id": "a"}, {"arxiv_id": "b", "title": "x y"}]).search("x")
+    assert [r["arxiv_id"] for r in resp["results"]] == ["b"], resp
+    for count in SIZES:
+        papers = make_papers(count)
+        start = time.perf_counter()
+        index = SearchIndex(papers)
+        print(f"{count:>8} papers  index built in {time.perf_counter() - start:6.2f}s  {len(index.postings)} terms")
+        for q in QUERIES:
+            seconds, resp = timed(lambda: index.search(q), 5 if count < 1000000 else 2)
+            if count <= 1000:
+                assert {r["arxiv_id"] for r in resp["results"]} == brute_force_matches(papers, q), q
+            line = f"    {q:<30} {len(resp['results']):>7} hits  index {seconds * 1000:9.2f} ms"
+            if count <= max_reference:
+                reference, _ = timed(lambda: search_reference(papers, q), 1)
+                line += f"  scan {reference * 1000:9.2f} ms  speedup x{reference / seconds:.0f}"
+            print(line)
+        del papers, index
+
+
+if __name__ == "__main__":
+    main()
@@ -10,6 +10,7 @@ Write-Host "  GET /papers"
 Write-Host "  GET /papers/{arxiv_id}"
 Write-Host "  GET /search?q={query}"
 Write-Host "  GET /stats"
+Write-Host "  GET /health"
 Write-Host ""
 
 docker run --rm --name arxiv-server -p "$Port`:8080" arxiv-server:latest
\ No newline at end of file
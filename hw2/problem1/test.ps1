@@ -26,6 +26,7 @@ function Test-Endpoint($url, $desc) {
 Test-Endpoint "http://localhost:$Port/papers" "/papers endpoint"
 Test-Endpoint "http://localhost:$Port/stats" "/stats endpoint"
 Test-Endpoint "http://localhost:$Port/search?q=machine" "search endpoint"
+Test-Endpoint "http://localhost:$Port/health" "/health endpoint"
 
 # test 404
 Write-Host "Testing 404 handling..."
@@ -1,5 +1,7 @@
 ﻿# Part G: build.ps1
 
 Write-Host "Building autoencoder training container"
-docker build -t arxiv-embeddings:latest .
+# repo-level context so the image also gets hw1/hw1_problem2/papers_io.py;
+# the root .dockerignore keeps the context down to the three files the image copies
+docker build -t arxiv-embeddings:latest -f Dockerfile ../..
 Write-Host "Build complete"
@@ -1,6 +1,7 @@
 import re
 import json
 import os
+import sys
 from collections import Counter
 from datetime import datetime, timezone
 import torch # type: ignore
@@ -8,6 +9,10 @@ import torch.nn as nn # type: ignore
 import torch.optim as optim # type: ignore
 from torch.utils.data import DataLoader, TensorDataset # type: ignore
 
+# papers_io.py is copied next to this file in the image and lives in hw1/hw1_problem2 in the source tree
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "hw1", "hw1_problem2"))
+from papers_io import iter_papers
+
 # Part A: parameter limit calculation
 def count_parameters(model):
     return sum(p.numel() for p in model.parameters() if p.requires_grad)
@@ -81,9 +86,12 @@ def train_autoencoder(
 ):
     # Load data
     # --- Load abstracts from JSON file ---
-    with open(input_file, "r", encoding="utf-8") as f:
-        papers = json.load(f) #list of papers
-    abstracts = [p["abstract"] for p in papers]
+    # only the two fields used here are kept; .jsonl/.parquet/.arrow are streamed
+    arxiv_ids = []
+    abstracts = []
+    for p in iter_papers(input_file, columns=["arxiv_id", "abstract"]):
+        arxiv_ids.append(p["arxiv_id"])
+        abstracts.append(p["abstract"])
 
     # Build vocabulary
     vocab_to_idx, idx_to_vocab, counter = build_vocab(abstracts, max_vocab_size=5000)
@@ -149,13 +157,13 @@ def train_autoencoder(
     # Save embeddings
     embeddings_out = []
     with torch.no_grad(): # disables gradient tracking
-        for p in papers:
-            bow = encode_bow(p["abstract"], vocab_to_idx, vocab_size).unsqueeze(0)
+        for arxiv_id, abstract in zip(arxiv_ids, abstracts):
+            bow = encode_bow(abstract, vocab_to_idx, vocab_size).unsqueeze(0)
             recon, emb = model(bow)
             loss = criterion(recon, bow) # reconstruction
             embeddings_out.append(
                 {
-                    "arxiv_id": p["arxiv_id"],
+                    "arxiv_id": arxiv_id,
                     "embedding": emb.squeeze().tolist(), #embedding vector list
                     "reconstruction_loss": float(loss.item()), # reconstruction quality 
                 }
@@ -184,7 +192,7 @@ def train_autoencoder(
         "epochs": epochs,
         "final_loss": avg_loss,
         "total_parameters": total_params,
-        "papers_processed": len(papers),
+        "papers_processed": len(arxiv_ids),
         "embedding_dimension": embedding_dim,
     }
     with open(
@@ -200,7 +208,7 @@ if __name__ == "__main__":
     import argparse
 
     parser = argparse.ArgumentParser()
-    parser.add_argument("input_file", help="Path to papers.json")
+    parser.add_argument("input_file", help="Path to papers.json (or .jsonl/.parquet/.arrow)")
     parser.add_argument("output_dir", help="Directory to save outputs")
     parser.add_argument("--epochs", type=int, default=50)
     parser.add_argument("--batch_size", type=int, default=32)
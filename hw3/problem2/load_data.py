@@ -5,6 +5,14 @@ from collections import Counter, defaultdict
 import boto3
 from botocore.exceptions import ClientError
 
+# streaming .jsonl/.parquet/.arrow reader from hw1/hw1_problem2 when it is available;
+# deployed on its own (scp of this file only) the loader reads papers.json as before
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "hw1", "hw1_problem2"))
+try:
+    from papers_io import iter_papers
+except ImportError:
+    iter_papers = None
+
 # list for keyword extraction
 STOPWORDS = {
     'the','a','an','and','or','but','in','on','at','to','for','of','with','by','from','up',
@@ -272,7 +280,14 @@ def main():
     table = ensure_table(client, resource, table_name)
 
     print(f"loading papers from {papers_path}")
-    papers = load_papers_json(papers_path)
+    # streamed, so .jsonl/.parquet/.arrow inputs are never held in memory whole
+    if iter_papers is not None:
+        papers = iter_papers(papers_path, load_json=load_papers_json)
+    elif papers_path.lower().endswith(".json"):
+        papers = load_papers_json(papers_path)
+    else:
+        print("reading .jsonl/.parquet/.arrow needs papers_io.py from hw1/hw1_problem2")
+        sys.exit(1)
 
     total_items = 0       # number of DynamoDB items written
     paper_count = 0       # number of input papers processed